@@ -1,8 +1,9 @@
 import streamlit as st
-import json
-import os
 from datetime import datetime
 
+import kanban_store
+import kanban_theme
+
 # Configuração da página
 st.set_page_config(
     page_title="Kanban Turis Tráfego",
@@ -10,12 +11,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Arquivo JSON para armazenar os dados
+# Arquivo para armazenar os dados: ".json" (snapshot + journal) ou ".db" (SQLite)
 DATA_FILE = "kanban_data.json"
+store = kanban_store.open_store(DATA_FILE)
+
+# Estado da interface desta sessão: ids das tarefas com o formulário de
+# edição aberto
+if "editing" not in st.session_state:
+    st.session_state.editing = set()
 
 # Inicializar dados
 def init_data():
-    if not os.path.exists(DATA_FILE):
+    if not store.exists():
         default_data = {
             "columns": {
                 "backlog": {"name": "Backlog", "tasks": []},
@@ -29,53 +36,35 @@ def init_data():
         save_data(default_data)
     return load_data()
 
-# Carregar dados do JSON
+# Carregar dados do JSON (só relê o arquivo quando ele muda em disco)
 def load_data():
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return store.load()
     except:
         return init_data()
 
 # Salvar dados no JSON
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    store.save(data)
+
+# Gravar uma alteração (criação, movimentação, edição ou exclusão). A
+# gravação só vale se o board não mudou desde a leitura (outra sessão pode
+# ter gravado antes): em conflito, relê o board e tenta de novo. O id de uma
+# tarefa nova é atribuído pelo store na gravação.
+MAX_RETRIES = 3
 
-# Gerar ID único
-def generate_id(data):
-    data["last_id"] += 1
-    return data["last_id"]
+def record_change(record):
+    for _ in range(MAX_RETRIES):
+        version = load_data().version
+        try:
+            return store.apply(record, expected_version=version)
+        except kanban_store.ConflictError:
+            continue
+    st.error("⚠️ O board está sendo alterado por outras pessoas. Tente novamente.")
+    return None
 
-# Classes CSS personalizadas
-st.markdown("""
-<style>
-    .kanban-column {
-        background-color: #f0f2f6;
-        padding: 15px;
-        border-radius: 10px;
-        margin: 5px;
-        min-height: 600px;
-    }
-    .task-card {
-        background-color: white;
-        padding: 12px;
-        margin: 8px 0;
-        border-radius: 8px;
-        border-left: 4px solid #ff4b4b;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .task-high {
-        border-left-color: #ff4b4b !important;
-    }
-    .task-medium {
-        border-left-color: #ffa500 !important;
-    }
-    .task-low {
-        border-left-color: #00cc66 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS personalizado (tema compartilhado, servido como arquivo estático)
+kanban_theme.apply_theme()
 
 # Header
 st.title("🚗 Kanban Turis Tráfego")
@@ -97,9 +86,7 @@ with st.sidebar:
         
         if submitted:
             if title:
-                data = load_data()
                 new_task = {
-                    "id": generate_id(data),
                     "title": title,
                     "description": description,
                     "priority": priority,
@@ -117,43 +104,20 @@ with st.sidebar:
                     "Concluído": "done"
                 }[column]
                 
-                data["columns"][column_key]["tasks"].append(new_task)
-                save_data(data)
-                st.success("Tarefa criada com sucesso!")
-                st.rerun()
+                if record_change({"op": "create", "column": column_key, "task": new_task}):
+                    st.success("Tarefa criada com sucesso!")
+                    st.rerun()
             else:
                 st.error("Título é obrigatório!")
 
 # Função para mover tarefa entre colunas
 def move_task(task_id, from_column, to_column):
-    data = load_data()
-    
-    # Encontrar e remover a tarefa da coluna original
-    task_to_move = None
-    for task in data["columns"][from_column]["tasks"]:
-        if task["id"] == task_id:
-            task_to_move = task
-            break
-    
-    if task_to_move:
-        data["columns"][from_column]["tasks"] = [
-            task for task in data["columns"][from_column]["tasks"] 
-            if task["id"] != task_id
-        ]
-        
-        # Adicionar à nova coluna
-        task_to_move["column"] = to_column
-        data["columns"][to_column]["tasks"].append(task_to_move)
-        save_data(data)
+    if record_change({"op": "move", "id": task_id, "from": from_column, "to": to_column}):
         st.rerun()
 
 # Função para editar tarefa
 def edit_task(task_id, current_column):
-    data = load_data()
-    task = next(
-        (t for t in data["columns"][current_column]["tasks"] 
-         if t["id"] == task_id), None
-    )
+    task = load_data().get(task_id)
     
     if task:
         with st.form(f"edit_task_{task_id}"):
@@ -178,44 +142,45 @@ def edit_task(task_id, current_column):
             
             with col1:
                 if st.form_submit_button("💾 Salvar"):
-                    task.update({
-                        "title": new_title,
-                        "description": new_description,
-                        "priority": new_priority,
-                        "assignee": new_assignee,
-                        "due_date": new_due_date.isoformat()
-                    })
-                    save_data(data)
-                    st.rerun()
+                    if record_change({
+                        "op": "update",
+                        "id": task_id,
+                        "column": current_column,
+                        "fields": {
+                            "title": new_title,
+                            "description": new_description,
+                            "priority": new_priority,
+                            "assignee": new_assignee,
+                            "due_date": new_due_date.isoformat()
+                        }
+                    }):
+                        st.session_state.editing.discard(task_id)
+                        st.rerun()
             
             with col2:
                 if st.form_submit_button("❌ Cancelar"):
+                    st.session_state.editing.discard(task_id)
                     st.rerun()
 
 # Função para excluir tarefa
 def delete_task(task_id, column_key):
-    data = load_data()
-    data["columns"][column_key]["tasks"] = [
-        task for task in data["columns"][column_key]["tasks"] 
-        if task["id"] != task_id
-    ]
-    save_data(data)
-    st.rerun()
+    if record_change({"op": "delete", "id": task_id, "column": column_key}):
+        st.rerun()
 
 # Layout do Kanban
 data = load_data()
-columns = st.columns(len(data["columns"]))
+columns = st.columns(len(data.columns))
 
-for idx, (column_key, column_data) in enumerate(data["columns"].items()):
+for idx, (column_key, column_data) in enumerate(data.columns.items()):
     with columns[idx]:
         # Header da coluna
-        st.subheader(f"{column_data['name']} ({len(column_data['tasks'])})")
+        st.subheader(f"{column_data.name} ({len(column_data)})")
         
         # Container da coluna
         with st.container():
             st.markdown('<div class="kanban-column">', unsafe_allow_html=True)
             
-            for task in column_data["tasks"]:
+            for task in column_data:
                 # Card da tarefa
                 priority_class = {
                     "Alta": "task-high",
@@ -247,7 +212,7 @@ for idx, (column_key, column_data) in enumerate(data["columns"].items()):
                 
                 with col1:
                     if st.button("✏️", key=f"edit_{task['id']}", help="Editar"):
-                        st.session_state[f"editing_{task['id']}"] = True
+                        st.session_state.editing.add(task["id"])
                 
                 with col2:
                     if st.button("🗑️", key=f"delete_{task['id']}", help="Excluir"):
@@ -256,15 +221,15 @@ for idx, (column_key, column_data) in enumerate(data["columns"].items()):
                 with col3:
                     # Botão de mover para direita
                     if column_key != "done":
-                        next_columns = list(data["columns"].keys())
+                        next_columns = list(data.columns.keys())
                         current_index = next_columns.index(column_key)
                         if current_index < len(next_columns) - 1:
                             next_column = next_columns[current_index + 1]
-                            if st.button("→", key=f"move_{task['id']}", help=f"Mover para {data['columns'][next_column]['name']}"):
+                            if st.button("→", key=f"move_{task['id']}", help=f"Mover para {data.columns[next_column].name}"):
                                 move_task(task["id"], column_key, next_column)
                 
                 # Modal de edição
-                if st.session_state.get(f"editing_{task['id']}", False):
+                if task["id"] in st.session_state.editing:
                     edit_task(task["id"], column_key)
                 
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -275,33 +240,32 @@ for idx, (column_key, column_data) in enumerate(data["columns"].items()):
 st.markdown("---")
 st.subheader("📊 Estatísticas")
 
-total_tasks = sum(len(col["tasks"]) for col in data["columns"].values())
+total_tasks = sum(len(col) for col in data.columns.values())
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     st.metric("Total de Tarefas", total_tasks)
 
 with col2:
-    completed = len(data["columns"]["done"]["tasks"])
+    completed = len(data.columns["done"])
     st.metric("Concluídas", completed)
 
 with col3:
-    in_progress = len(data["columns"]["in_progress"]["tasks"])
+    in_progress = len(data.columns["in_progress"])
     st.metric("Em Progresso", in_progress)
 
 with col4:
-    backlog = len(data["columns"]["backlog"]["tasks"])
+    backlog = len(data.columns["backlog"])
     st.metric("Backlog", backlog)
 
 # Botão para exportar dados
 if st.sidebar.button("📤 Exportar Dados JSON"):
-    with open(DATA_FILE, "r") as f:
-        st.sidebar.download_button(
-            label="Baixar JSON",
-            data=f.read(),
-            file_name="kanban_turis_trafego.json",
-            mime="application/json"
-        )
+    st.sidebar.download_button(
+        label="Baixar JSON",
+        data=store.export_json(),
+        file_name="kanban_turis_trafego.json",
+        mime="application/json"
+    )
 
 # Botão para limpar todos os dados
 if st.sidebar.button("🗑️ Limpar Todos os Dados"):
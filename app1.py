@@ -1,8 +1,9 @@
 import streamlit as st
-import json
-import os
 from datetime import datetime
 
+import kanban_store
+import kanban_theme
+
 # Configuração da página
 st.set_page_config(
     page_title="Kanban Turis Tráfego",
@@ -10,12 +11,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Arquivo JSON para armazenar os dados
+# Arquivo para armazenar os dados: ".json" (snapshot + journal) ou ".db" (SQLite)
 DATA_FILE = "kanban_data.json"
+store = kanban_store.open_store(DATA_FILE)
+
+# Estado da interface desta sessão: ids das tarefas com o formulário de
+# edição aberto
+if "editing" not in st.session_state:
+    st.session_state.editing = set()
 
 # Inicializar dados
 def init_data():
-    if not os.path.exists(DATA_FILE):
+    if not store.exists():
         default_data = {
             "columns": {
                 "backlog": {"name": "Backlog", "tasks": []},
@@ -29,106 +36,35 @@ def init_data():
         save_data(default_data)
     return load_data()
 
-# Carregar dados do JSON
+# Carregar dados do JSON (só relê o arquivo quando ele muda em disco)
 def load_data():
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return store.load()
     except:
         return init_data()
 
 # Salvar dados no JSON
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    store.save(data)
 
-# Gerar ID único
-def generate_id(data):
-    data["last_id"] += 1
-    return data["last_id"]
+# Gravar uma alteração (criação, movimentação, edição ou exclusão). A
+# gravação só vale se o board não mudou desde a leitura (outra sessão pode
+# ter gravado antes): em conflito, relê o board e tenta de novo. O id de uma
+# tarefa nova é atribuído pelo store na gravação.
+MAX_RETRIES = 3
 
-# CSS personalizado
-st.markdown("""
-<style>
-    .kanban-container {
-        display: flex;
-        gap: 15px;
-        padding: 10px 0;
-        overflow-x: auto;
-        min-height: 650px;
-    }
-    .kanban-column {
-        background: white;
-        border-radius: 10px;
-        padding: 15px;
-        min-width: 280px;
-        min-height: 600px;
-        border: 2px solid #e9ecef;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    .column-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 15px;
-        border-radius: 8px;
-        margin-bottom: 15px;
-        text-align: center;
-        font-weight: bold;
-        font-size: 1.1em;
-    }
-    .task-card {
-        background: white;
-        padding: 15px;
-        margin: 10px 0;
-        border-radius: 8px;
-        border-left: 5px solid;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        transition: all 0.3s ease;
-    }
-    .task-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-    }
-    .task-high {
-        border-left-color: #ff4b4b;
-    }
-    .task-medium {
-        border-left-color: #ffa500;
-    }
-    .task-low {
-        border-left-color: #00cc66;
-    }
-    .task-info {
-        margin: 8px 0;
-        font-size: 0.85em;
-        color: #555;
-    }
-    .task-title {
-        font-weight: bold;
-        font-size: 1.1em;
-        margin-bottom: 8px;
-        color: #333;
-    }
-    .empty-column {
-        text-align: center;
-        color: #666;
-        padding: 40px 20px;
-        font-style: italic;
-    }
-    .action-buttons {
-        display: flex;
-        gap: 8px;
-        margin-top: 10px;
-    }
-    .move-buttons {
-        display: flex;
-        gap: 5px;
-        margin-top: 10px;
-        border-top: 1px solid #f0f0f0;
-        padding-top: 10px;
-    }
-</style>
-""", unsafe_allow_html=True)
+def record_change(record):
+    for _ in range(MAX_RETRIES):
+        version = load_data().version
+        try:
+            return store.apply(record, expected_version=version)
+        except kanban_store.ConflictError:
+            continue
+    st.error("⚠️ O board está sendo alterado por outras pessoas. Tente novamente.")
+    return None
+
+# CSS personalizado (tema compartilhado, servido como arquivo estático)
+kanban_theme.apply_theme()
 
 # Header
 st.title("🚗 Kanban Turis Tráfego")
@@ -150,9 +86,7 @@ with st.sidebar:
         
         if submitted:
             if title:
-                data = load_data()
                 new_task = {
-                    "id": generate_id(data),
                     "title": title,
                     "description": description,
                     "priority": priority,
@@ -170,53 +104,25 @@ with st.sidebar:
                     "Concluído": "done"
                 }[column]
                 
-                data["columns"][column_key]["tasks"].append(new_task)
-                save_data(data)
-                st.success("✅ Tarefa criada com sucesso!")
-                st.rerun()
+                if record_change({"op": "create", "column": column_key, "task": new_task}):
+                    st.success("✅ Tarefa criada com sucesso!")
+                    st.rerun()
             else:
                 st.error("❌ Título é obrigatório!")
 
 # Função para mover tarefa entre colunas
 def move_task(task_id, from_column, to_column):
-    data = load_data()
-    
-    # Encontrar e remover a tarefa da coluna original
-    task_to_move = None
-    for task in data["columns"][from_column]["tasks"]:
-        if task["id"] == task_id:
-            task_to_move = task
-            break
-    
-    if task_to_move:
-        data["columns"][from_column]["tasks"] = [
-            task for task in data["columns"][from_column]["tasks"] 
-            if task["id"] != task_id
-        ]
-        
-        # Adicionar à nova coluna
-        task_to_move["column"] = to_column
-        data["columns"][to_column]["tasks"].append(task_to_move)
-        save_data(data)
+    if record_change({"op": "move", "id": task_id, "from": from_column, "to": to_column}):
         st.rerun()
 
 # Função para excluir tarefa
 def delete_task(task_id, column_key):
-    data = load_data()
-    data["columns"][column_key]["tasks"] = [
-        task for task in data["columns"][column_key]["tasks"] 
-        if task["id"] != task_id
-    ]
-    save_data(data)
-    st.rerun()
+    if record_change({"op": "delete", "id": task_id, "column": column_key}):
+        st.rerun()
 
 # Função para editar tarefa
 def edit_task(task_id, current_column):
-    data = load_data()
-    task = next(
-        (t for t in data["columns"][current_column]["tasks"] 
-         if t["id"] == task_id), None
-    )
+    task = load_data().get(task_id)
     
     if task:
         with st.form(f"edit_task_{task_id}"):
@@ -241,20 +147,24 @@ def edit_task(task_id, current_column):
             
             with col1:
                 if st.form_submit_button("💾 Salvar Alterações"):
-                    task.update({
-                        "title": new_title,
-                        "description": new_description,
-                        "priority": new_priority,
-                        "assignee": new_assignee,
-                        "due_date": new_due_date.isoformat()
-                    })
-                    save_data(data)
-                    st.session_state[f"editing_{task['id']}"] = False
-                    st.rerun()
+                    if record_change({
+                        "op": "update",
+                        "id": task_id,
+                        "column": current_column,
+                        "fields": {
+                            "title": new_title,
+                            "description": new_description,
+                            "priority": new_priority,
+                            "assignee": new_assignee,
+                            "due_date": new_due_date.isoformat()
+                        }
+                    }):
+                        st.session_state.editing.discard(task_id)
+                        st.rerun()
             
             with col2:
                 if st.form_submit_button("❌ Cancelar"):
-                    st.session_state[f"editing_{task['id']}"] = False
+                    st.session_state.editing.discard(task_id)
                     st.rerun()
 
 # Função para renderizar card da tarefa
@@ -298,7 +208,7 @@ def render_task_card(task, column_key, column_index, all_columns):
         col1, col2 = st.columns(2)
         with col1:
             if st.button("✏️", key=f"edit_{task['id']}", help="Editar", use_container_width=True):
-                st.session_state[f"editing_{task['id']}"] = True
+                st.session_state.editing.add(task["id"])
         with col2:
             if st.button("🗑️", key=f"delete_{task['id']}", help="Excluir", use_container_width=True):
                 delete_task(task["id"], column_key)
@@ -311,7 +221,7 @@ def render_task_card(task, column_key, column_index, all_columns):
             if column_index > 0:
                 prev_column = column_keys[column_index - 1]
                 if st.button("←", key=f"left_{task['id']}", 
-                           help=f"Mover para {all_columns[prev_column]['name']}",
+                           help=f"Mover para {all_columns[prev_column].name}",
                            use_container_width=True):
                     move_task(task["id"], column_key, prev_column)
         
@@ -319,12 +229,12 @@ def render_task_card(task, column_key, column_index, all_columns):
             if column_index < len(column_keys) - 1:
                 next_column = column_keys[column_index + 1]
                 if st.button("→", key=f"right_{task['id']}", 
-                           help=f"Mover para {all_columns[next_column]['name']}",
+                           help=f"Mover para {all_columns[next_column].name}",
                            use_container_width=True):
                     move_task(task["id"], column_key, next_column)
         
         # Modal de edição
-        if st.session_state.get(f"editing_{task['id']}", False):
+        if task["id"] in st.session_state.editing:
             edit_task(task["id"], column_key)
 
 # Renderizar o Kanban
@@ -332,22 +242,22 @@ def render_kanban():
     data = load_data()
     
     # Criar colunas
-    columns = st.columns(len(data["columns"]))
+    columns = st.columns(len(data.columns))
     
-    for idx, (column_key, column_data) in enumerate(data["columns"].items()):
+    for idx, (column_key, column_data) in enumerate(data.columns.items()):
         with columns[idx]:
             # Header da coluna
             st.markdown(
-                f'<div class="column-header">{column_data["name"]} ({len(column_data["tasks"])})</div>', 
+                f'<div class="column-header">{column_data.name} ({len(column_data)})</div>', 
                 unsafe_allow_html=True
             )
             
             # Área de tasks da coluna
-            if column_data["tasks"]:
-                for task in column_data["tasks"]:
+            if column_data:
+                for task in column_data:
                     # Verificar se está editando
-                    if not st.session_state.get(f"editing_{task['id']}", False):
-                        render_task_card(task, column_key, idx, data["columns"])
+                    if task["id"] not in st.session_state.editing:
+                        render_task_card(task, column_key, idx, data.columns)
                     else:
                         edit_task(task["id"], column_key)
             else:
@@ -364,10 +274,10 @@ st.markdown("---")
 st.subheader("📊 Estatísticas do Projeto")
 
 data = load_data()
-total_tasks = sum(len(col["tasks"]) for col in data["columns"].values())
-completed = len(data["columns"]["done"]["tasks"])
-in_progress = len(data["columns"]["in_progress"]["tasks"]) + len(data["columns"]["review"]["tasks"])
-backlog = len(data["columns"]["backlog"]["tasks"]) + len(data["columns"]["to_do"]["tasks"])
+total_tasks = sum(len(col) for col in data.columns.values())
+completed = len(data.columns["done"])
+in_progress = len(data.columns["in_progress"]) + len(data.columns["review"])
+backlog = len(data.columns["backlog"]) + len(data.columns["to_do"])
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -392,14 +302,13 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("⚙️ Configurações")
 
 if st.sidebar.button("📤 Exportar Dados JSON", use_container_width=True):
-    with open(DATA_FILE, "r") as f:
-        st.sidebar.download_button(
-            label="📥 Baixar Arquivo JSON",
-            data=f.read(),
-            file_name="kanban_turis_trafego.json",
-            mime="application/json",
-            use_container_width=True
-        )
+    st.sidebar.download_button(
+        label="📥 Baixar Arquivo JSON",
+        data=store.export_json(),
+        file_name="kanban_turis_trafego.json",
+        mime="application/json",
+        use_container_width=True
+    )
 
 if st.sidebar.button("🔄 Reiniciar Board", use_container_width=True):
     if st.sidebar.confirm("Tem certeza? Todos os dados serão perdidos."):
@@ -439,9 +348,4 @@ with st.expander("ℹ️ Como usar o Kanban"):
     - Use o formulário na barra lateral
     - Preencha pelo menos o título
     - Selecione a coluna inicial
-    """)
-
-# Inicializar session state para edição
-for key in st.session_state.keys():
-    if key.startswith('editing_'):
-        st.session_state[key] = False
\ No newline at end of file
+    """)
\ No newline at end of file
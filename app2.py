@@ -2,12 +2,20 @@ import streamlit as st
 import json
 import os
 import uuid
+import kanban_store
 from streamlit_kanban_board_goviceversa import kanban_board # Componente em uso
 
 # --- Configurações Iniciais ---
 st.set_page_config(layout="wide", page_title="Kanban Board Dinâmico")
 
 FILE_PATH = "kanban_data.json"
+# Formato do arquivo: "json" (compacto), "gzip", "zstd" ou "msgpack".
+# A leitura detecta o formato pelo cabeçalho do arquivo
+SNAPSHOT_FORMAT = "json"
+# Inspetor de dados: cards por página e tamanho máximo (em caracteres de
+# JSON) enviado por página, qualquer que seja o tamanho do board
+INSPECTOR_PAGE_SIZE = 25
+INSPECTOR_MAX_CHARS = 20000
 
 # --- Cores/Prioridades para o Kanban ---
 PRIORITY_COLORS = {
@@ -44,29 +52,96 @@ def load_data():
     
     if os.path.exists(FILE_PATH):
         try:
-            with open(FILE_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if "columns" in data and "cards" in data:
-                    # Trata cards antigos que não têm cor (para compatibilidade)
-                    for card in data["cards"]:
-                        if "color" not in card:
-                            card["color"] = PRIORITY_COLORS.get(card.get("priority", "Nenhuma"), PRIORITY_COLORS["Nenhuma"])
-                    return data
-        except json.JSONDecodeError:
-            st.warning("Arquivo JSON corrompido ou vazio. Usando dados padrão.")
+            data = kanban_store.read_snapshot(FILE_PATH)
+            if "columns" in data and "cards" in data:
+                # Trata cards antigos que não têm cor (para compatibilidade)
+                for card in data["cards"]:
+                    if "color" not in card:
+                        card["color"] = PRIORITY_COLORS.get(card.get("priority", "Nenhuma"), PRIORITY_COLORS["Nenhuma"])
+                return data
+        except (ValueError, OSError):
+            st.warning("Arquivo de dados corrompido ou vazio. Usando dados padrão.")
             pass # Continua para retornar dados padrão
     
     return default_data
 
 def save_data(data):
-    """Salva os dados atuais no arquivo JSON."""
-    with open(FILE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    """Salva os dados atuais no arquivo, no formato SNAPSHOT_FORMAT."""
+    kanban_store.write_snapshot(FILE_PATH, data, SNAPSHOT_FORMAT)
     st.session_state.data = data
 
+def index_cards(cards):
+    """Mapeia o id de cada card para sua posição na lista de cards."""
+    return {card["id"]: i for i, card in enumerate(cards)}
+
+# --- Sincronização com o componente (deltas) ---
+# Cada card tem uma revisão ("rev", a etag do card) que sobe a cada mudança.
+# A sessão guarda, por card, só a tupla (coluna, posição na coluna, rev): o
+# retorno do componente é comparado com ela, sem comparar as listas inteiras,
+# e vira uma lista de deltas {"id", "column_id", "order"} com os cards que
+# mudaram. Apenas esses cards são alterados.
+
+def card_states(cards):
+    """Estado de sincronização de cada card: (coluna, posição na coluna, rev)."""
+    states = {}
+    positions = {}
+    for card in cards:
+        order = positions.get(card["column_id"], 0)
+        positions[card["column_id"]] = order + 1
+        states[card["id"]] = (card["column_id"], order, card.get("rev", 0))
+    return states
+
+def card_deltas(items):
+    """Deltas dos cards que mudaram de coluna ou de posição no retorno do componente.
+
+    Cards com rev diferente da atual vêm de uma versão antiga do board (por
+    exemplo, editados na barra lateral depois do envio) e são ignorados.
+    """
+    states = st.session_state.card_states
+    positions = {}
+    deltas = []
+    for item in items:
+        column_id = item.get("column_id")
+        order = positions.get(column_id, 0)
+        positions[column_id] = order + 1
+        state = states.get(item.get("id"))
+        if state is None or item.get("rev", 0) != state[2]:
+            continue
+        if state[0] != column_id or state[1] != order:
+            deltas.append({"id": item["id"], "column_id": column_id, "order": order})
+    return deltas
+
+def apply_card_deltas(deltas):
+    """Aplica os deltas {"id", "column_id", "order"} aos cards da sessão."""
+    cards = st.session_state.data["cards"]
+    index = st.session_state.card_index
+    states = st.session_state.card_states
+    for delta in deltas:
+        position = index.get(delta["id"])
+        if position is None:
+            continue
+        card = cards[position]
+        card["column_id"] = delta["column_id"]
+        card["rev"] = card.get("rev", 0) + 1
+        states[card["id"]] = (delta["column_id"], delta["order"], card["rev"])
+
+    # Cards na ordem das colunas e, dentro de cada uma, na ordem recebida
+    column_order = {column_id: i for i, column_id in enumerate(COLUMN_IDS)}
+    cards.sort(key=lambda card: (
+        column_order.get(card["column_id"], len(column_order)),
+        states[card["id"]][1]
+    ))
+    st.session_state.card_index = index_cards(cards)
+
+def reset_card_index():
+    """Recalcula posições e estados depois de incluir ou remover cards."""
+    st.session_state.card_index = index_cards(st.session_state.data["cards"])
+    st.session_state.card_states = card_states(st.session_state.data["cards"])
+
 # --- Inicialização ---
 if 'data' not in st.session_state:
     st.session_state.data = load_data()
+    reset_card_index()
 
 # --- Mapeamento para Widgets do Streamlit ---
 # Usamos a lista de colunas do JSON para criar os SELECTBOXES
@@ -89,10 +164,11 @@ try:
         # Vamos manter apenas os essenciais. Se o erro persistir, remova os estilos.
     )
 
-    # Verifica se a chamada retornou algo e se é diferente do estado atual
-    if updated_cards is not None and updated_cards != st.session_state.data["cards"]:
-        # Se o componente retornar a lista de cards atualizada, salvamos ela
-        st.session_state.data["cards"] = updated_cards
+    # Aplica só os cards que mudaram de coluna ou de posição
+    if updated_cards is not None:
+        deltas = card_deltas(updated_cards)
+        if deltas:
+            apply_card_deltas(deltas)
         # Não precisa de rerun, pois o Streamlit atualiza após a interação com o componente.
 
 except TypeError as e:
@@ -126,9 +202,12 @@ with st.sidebar.form("new_card_form", clear_on_submit=True):
             "description": new_description,
             "column_id": new_col_id,
             "priority": new_priority_name,
-            "color": PRIORITY_COLORS[new_priority_name]
+            "color": PRIORITY_COLORS[new_priority_name],
+            "rev": 1
         }
         st.session_state.data["cards"].append(new_card)
+        st.session_state.card_index[new_id] = len(st.session_state.data["cards"]) - 1
+        st.session_state.card_states = card_states(st.session_state.data["cards"])
         st.experimental_rerun() # Recarrega para que o novo card apareça no board
 
 # --- Lógica de Edição e Remoção (Inalterada) ---
@@ -150,7 +229,7 @@ if card_titles:
     )
 
     if card_to_edit_id:
-        card_index = next(i for i, card in enumerate(st.session_state.data["cards"]) if card["id"] == card_to_edit_id)
+        card_index = st.session_state.card_index[card_to_edit_id]
         current_card = st.session_state.data["cards"][card_index]
 
         st.sidebar.subheader(f"Editar Card: {current_card['title']}")
@@ -179,12 +258,17 @@ if card_titles:
             st.session_state.data["cards"][card_index]["description"] = edited_description
             st.session_state.data["cards"][card_index]["priority"] = edited_priority
             st.session_state.data["cards"][card_index]["color"] = PRIORITY_COLORS[edited_priority]
+            # Nova revisão: retornos do componente com a versão anterior são ignorados
+            current_card["rev"] = current_card.get("rev", 0) + 1
+            column_id, order, _ = st.session_state.card_states[card_to_edit_id]
+            st.session_state.card_states[card_to_edit_id] = (column_id, order, current_card["rev"])
             
             st.success(f"Card '{edited_title}' atualizado!")
             st.experimental_rerun()
 
         if delete_button:
             st.session_state.data["cards"].pop(card_index)
+            reset_card_index()
             st.warning(f"Card '{current_card['title']}' removido!")
             st.experimental_rerun()
 else:
@@ -196,5 +280,65 @@ if st.button("💾 Salvar Dados em JSON"):
     save_data(st.session_state.data)
     st.success("Dados salvos em kanban_data.json com sucesso!")
 
-st.caption(f"Dados atuais em `{FILE_PATH}`:")
-st.json(st.session_state.data)
\ No newline at end of file
+# Exportação em JSON formatado (o arquivo de dados fica compacto). O JSON
+# só é montado quando pedido, não a cada rerun
+if st.button("📤 Exportar JSON"):
+    st.download_button(
+        label="📥 Baixar Arquivo JSON",
+        data=json.dumps(st.session_state.data, indent=4, ensure_ascii=False),
+        file_name="kanban_export.json",
+        mime="application/json"
+    )
+
+# --- Inspetor de Dados ---
+# Mostra contagens e uma página de cards por vez: o navegador recebe só a
+# fatia exibida, não o board inteiro
+
+def inspector_page(cards, page, page_size, max_chars):
+    """Cards da página (começando em 1), cortada ao passar de max_chars de JSON.
+
+    Retorna os cards e se a página foi cortada.
+    """
+    start = (page - 1) * page_size
+    shown = []
+    size = 0
+    for card in cards[start:start + page_size]:
+        size += len(json.dumps(card, ensure_ascii=False))
+        if shown and size > max_chars:
+            return shown, True
+        shown.append(card)
+    return shown, False
+
+with st.expander(f"🔍 Dados atuais em `{FILE_PATH}`"):
+    all_cards = st.session_state.data["cards"]
+    counts = {column_id: 0 for column_id in COLUMN_IDS}
+    for card in all_cards:
+        counts[card.get("column_id")] = counts.get(card.get("column_id"), 0) + 1
+
+    summary_cols = st.columns(len(counts) + 1)
+    summary_cols[0].metric("Cards", len(all_cards))
+    for col, (column_id, count) in zip(summary_cols[1:], counts.items()):
+        col.metric(COLUMNS_MAP.get(column_id, column_id), count)
+
+    inspect_column = st.selectbox(
+        "Coluna",
+        options=[None] + COLUMN_IDS,
+        format_func=lambda x: COLUMNS_MAP[x] if x else "Todas",
+        key="inspector_column"
+    )
+    if inspect_column:
+        cards_to_show = [card for card in all_cards if card.get("column_id") == inspect_column]
+    else:
+        cards_to_show = all_cards
+
+    pages = max(1, -(-len(cards_to_show) // INSPECTOR_PAGE_SIZE))
+    # A página guardada pode não existir mais (outra coluna, cards removidos)
+    if st.session_state.get("inspector_page", 1) > pages:
+        st.session_state.inspector_page = pages
+    page = st.number_input("Página", min_value=1, max_value=pages, key="inspector_page")
+    page_cards, truncated = inspector_page(cards_to_show, page, INSPECTOR_PAGE_SIZE, INSPECTOR_MAX_CHARS)
+
+    st.caption(f"Página {page} de {pages} • {len(cards_to_show)} cards")
+    st.json(page_cards)
+    if truncated:
+        st.caption(f"Página cortada em {len(page_cards)} cards (limite de {INSPECTOR_MAX_CHARS} caracteres).")
\ No newline at end of file
@@ -1,7 +1,12 @@
 import streamlit as st
-import json
-import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import kanban_archive
+import kanban_board
+import kanban_history
+import kanban_store
+import kanban_theme
+import kanban_view
 
 # Configuração da página
 st.set_page_config(
@@ -10,12 +15,74 @@ st.set_page_config(
     layout="wide"
 )
 
-# Arquivo JSON para armazenar os dados
+# Arquivo para armazenar os dados: ".json" (snapshot + journal) ou ".db" (SQLite)
 DATA_FILE = "kanban_data.json"
+# Cliques em sequência são gravados juntos, no máximo COMMIT_DELAY segundos
+# depois da primeira mutação pendente (0 grava a cada clique)
+COMMIT_DELAY = 0.5
+# Grava numa thread separada: os cliques não esperam pelo disco, mas uma
+# alteração aceita pode se perder se o processo cair antes da gravação
+BACKGROUND_WRITES = False
+# Formato do snapshot JSON: "json" (compacto), "gzip", "zstd" ou "msgpack".
+# A leitura detecta o formato sozinha; JSON indentado só na exportação
+SNAPSHOT_FORMAT = "json"
+# Snapshot segmentado por coluna: a abertura lê só nomes, ids e contagens, e
+# as tarefas de cada coluna são lidas quando ela é exibida
+LAZY_COLUMNS = True
+store = kanban_store.open_store(
+    DATA_FILE,
+    commit_delay=COMMIT_DELAY,
+    background=BACKGROUND_WRITES,
+    snapshot_format=SNAPSHOT_FORMAT,
+    lazy_columns=LAZY_COLUMNS
+)
+
+# Tarefas concluídas há mais de ARCHIVE_AFTER_DAYS dias vão para o arquivo
+# morto (verificado no máximo a cada ARCHIVE_INTERVAL segundos)
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_INTERVAL = 3600
+archive = kanban_archive.open_archive(DATA_FILE)
+
+# Histórico de eventos com horário, para consultar o board em datas passadas
+history = kanban_history.open_history(store)
+
+# Cards exibidos por coluna; "Carregar mais" mostra outros PAGE_SIZE
+PAGE_SIZE = 20
+# Ordenação de cada coluna, escolhida na própria coluna (kanban_board.SORT_MODES)
+SORT_LABELS = {
+    "manual": "Ordem manual",
+    "priority": "Prioridade e vencimento",
+    "due": "Vencimento",
+    "created": "Data de criação"
+}
+# Resultados exibidos pela busca de tarefas
+SEARCH_LIMIT = 20
+# Tarefas que vencem em até DUE_SOON_DAYS dias ficam destacadas, e o painel
+# de prazos lista no máximo DEADLINE_LIST tarefas de cada grupo
+DUE_SOON_DAYS = 3
+DEADLINE_LIST = 5
+# Filtros de vencimento: dias a partir de hoje (início, fim), None em aberto
+DUE_FILTERS = {
+    "Qualquer data": None,
+    "Atrasadas": (None, -1),
+    "Hoje": (0, 0),
+    "Próximos 7 dias": (0, 6),
+    "Próximos 30 dias": (0, 29)
+}
+# Ações numa barra por coluna: os cards são marcados numa seleção e uma única
+# barra edita, exclui ou move os selecionados, com um número fixo de widgets
+# por coluna (False: botões de editar, excluir e mover em cada card)
+ACTION_BAR = True
+
+# Estado da interface desta sessão: ids das tarefas com o formulário de
+# edição aberto. Consultar e limpar custa o que está aberto, não o número de
+# cards já exibidos na sessão
+if "editing" not in st.session_state:
+    st.session_state.editing = set()
 
 # Inicializar dados
 def init_data():
-    if not os.path.exists(DATA_FILE):
+    if not store.exists():
         default_data = {
             "columns": {
                 "backlog": {"name": "Backlog", "tasks": []},
@@ -29,171 +96,52 @@ def init_data():
         save_data(default_data)
     return load_data()
 
-# Carregar dados do JSON
+# Carregar dados do JSON (só relê o arquivo quando ele muda em disco)
 def load_data():
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return store.load()
     except:
         return init_data()
 
-# Salvar dados no JSON
+# Salvar dados no JSON (reescreve o arquivo inteiro)
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-# Gerar ID único
-def generate_id(data):
-    data["last_id"] += 1
-    return data["last_id"]
-
-# CSS personalizado
-st.markdown("""
-<style>
-    .kanban-container {
-        display: flex;
-        gap: 15px;
-        padding: 10px 0;
-        overflow-x: auto;
-        min-height: 650px;
-    }
-    .kanban-column {
-        background: white;
-        border-radius: 10px;
-        padding: 15px;
-        min-width: 280px;
-        min-height: 600px;
-        border: 2px solid #e9ecef;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    .column-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 15px;
-        border-radius: 8px;
-        margin-bottom: 15px;
-        text-align: center;
-        font-weight: bold;
-        font-size: 1.1em;
-    }
-    .task-card {
-        background: white;
-        padding: 15px;
-        margin: 10px 0;
-        border-radius: 10px;
-        border-left: 5px solid;
-        box-shadow: 0 3px 6px rgba(0,0,0,0.1);
-        transition: all 0.3s ease;
-        border: 1px solid #e0e0e0;
-        position: relative;
-    }
-    .task-card:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-    }
-    .task-high {
-        border-left-color: #ff4b4b;
-        background: linear-gradient(135deg, #fff 0%, #fff5f5 100%);
-    }
-    .task-medium {
-        border-left-color: #ffa500;
-        background: linear-gradient(135deg, #fff 0%, #fffaf0 100%);
-    }
-    .task-low {
-        border-left-color: #00cc66;
-        background: linear-gradient(135deg, #fff 0%, #f0fff4 100%);
-    }
-    .task-info {
-        margin: 6px 0;
-        font-size: 0.8em;
-        color: #555;
-        display: flex;
-        align-items: center;
-        gap: 5px;
-    }
-    .task-title {
-        font-weight: bold;
-        font-size: 1em;
-        margin-bottom: 10px;
-        color: #333;
-        line-height: 1.3;
-    }
-    .task-description {
-        font-size: 0.85em;
-        color: #666;
-        margin-bottom: 8px;
-        line-height: 1.4;
-    }
-    .empty-column {
-        text-align: center;
-        color: #666;
-        padding: 40px 20px;
-        font-style: italic;
-        background: #fafafa;
-        border-radius: 8px;
-        margin: 10px 0;
-    }
-    .action-buttons {
-        display: flex;
-        gap: 5px;
-        margin-top: 12px;
-        justify-content: flex-end;
-    }
-    .small-button {
-        padding: 2px 8px !important;
-        font-size: 0.7em !important;
-        height: 24px !important;
-        min-height: 24px !important;
-    }
-    .move-buttons {
-        display: flex;
-        gap: 3px;
-        margin-top: 10px;
-        border-top: 1px solid #f0f0f0;
-        padding-top: 8px;
-    }
-    .move-btn {
-        flex: 1;
-        padding: 3px 6px !important;
-        font-size: 0.75em !important;
-        height: 26px !important;
-        min-height: 26px !important;
-    }
-    .priority-badge {
-        display: inline-block;
-        padding: 2px 8px;
-        border-radius: 12px;
-        font-size: 0.7em;
-        font-weight: bold;
-        margin-bottom: 8px;
-    }
-    .priority-high {
-        background: #ff4b4b;
-        color: white;
-    }
-    .priority-medium {
-        background: #ffa500;
-        color: white;
-    }
-    .priority-low {
-        background: #00cc66;
-        color: white;
-    }
-    .task-meta {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        margin-top: 8px;
-        font-size: 0.75em;
-        color: #888;
-    }
-</style>
-""", unsafe_allow_html=True)
+    store.save(data)
+
+# Número de tentativas quando outra sessão grava no board ao mesmo tempo
+MAX_RETRIES = 3
+
+# Registrar uma mutação no board (append de uma linha, sem reescrever o board).
+# A gravação faz compare-and-swap na versão do board: se outra sessão gravou
+# depois da nossa leitura, relemos o board e tentamos de novo. O id de tarefas
+# novas é alocado pelo store na gravação, então nunca se repete.
+def record_change(record):
+    for _ in range(MAX_RETRIES):
+        version = load_data().version
+        try:
+            return store.apply(record, expected_version=version)
+        except kanban_store.ConflictError:
+            continue
+    st.error("⚠️ O board está sendo alterado por outras pessoas. Tente novamente.")
+    return None
+
+# CSS personalizado (tema compartilhado, servido como arquivo estático)
+kanban_theme.apply_theme()
 
 # Header
 st.title("🚗 Kanban Turis Tráfego")
 st.markdown("---")
 
+# Falha na gravação em segundo plano: as alterações seguem em memória e a
+# gravação é tentada de novo automaticamente
+if store.write_error is not None:
+    st.error(f"⚠️ Não foi possível salvar as últimas alterações ({store.write_error}). Elas serão gravadas assim que possível.")
+if store.history_error is not None:
+    st.warning(f"⚠️ O histórico do board não está sendo gravado ({store.history_error}).")
+
+# Arquivar as tarefas concluídas antigas
+load_data()
+kanban_archive.archive_if_due(store, archive, "done", ARCHIVE_AFTER_DAYS, ARCHIVE_INTERVAL)
+
 # Sidebar para adicionar novas tarefas
 with st.sidebar:
     st.header("➕ Nova Tarefa")
@@ -210,9 +158,7 @@ with st.sidebar:
         
         if submitted:
             if title:
-                data = load_data()
                 new_task = {
-                    "id": generate_id(data),
                     "title": title,
                     "description": description,
                     "priority": priority,
@@ -229,148 +175,190 @@ with st.sidebar:
                     "Revisão": "review",
                     "Concluído": "done"
                 }[column]
+                if column_key == "done":
+                    new_task["completed_at"] = new_task["created_at"]
                 
-                data["columns"][column_key]["tasks"].append(new_task)
-                save_data(data)
-                st.success("✅ Tarefa criada com sucesso!")
-                st.rerun()
+                if record_change({"op": "create", "column": column_key, "task": new_task}):
+                    st.success("✅ Tarefa criada com sucesso!")
+                    st.rerun()
             else:
                 st.error("❌ Título é obrigatório!")
 
-# Função para mover tarefa entre colunas
+# Filtros do board (índices do board: o custo é o tamanho do resultado)
+st.sidebar.markdown("---")
+st.sidebar.subheader("🔎 Filtros")
+st.sidebar.text_input("Responsável", placeholder="Nome do responsável", key="filter_assignee")
+st.sidebar.multiselect("Prioridade", ["Alta", "Média", "Baixa"], key="filter_priorities")
+st.sidebar.selectbox("Vencimento", list(DUE_FILTERS), key="filter_due")
+
+# Ids das tarefas que passam pelos filtros (None sem filtro ativo)
+def filtered_ids(data):
+    assignee = st.session_state.get("filter_assignee", "").strip()
+    due_from = due_to = None
+    due_range = DUE_FILTERS.get(st.session_state.get("filter_due"))
+    if due_range is not None:
+        today = datetime.now().date()
+        start, end = due_range
+        due_from = today + timedelta(days=start) if start is not None else None
+        due_to = today + timedelta(days=end) if end is not None else None
+    return data.filter(
+        assignees=[assignee] if assignee else (),
+        priorities=st.session_state.get("filter_priorities", ()),
+        due_from=due_from,
+        due_to=due_to
+    )
+
+# Cada coluna e os painéis de estatísticas e de prazos são fragments com
+# chave própria: uma mudança redesenha só as partes afetadas, não o script
+# inteiro
+def column_fragment(column_key):
+    return f"column_{column_key}"
+
+STATS_FRAGMENT = "stats"
+DEADLINES_FRAGMENT = "deadlines"
+# Painéis que resumem o board inteiro, redesenhados a cada mutação
+SUMMARY_FRAGMENTS = (STATS_FRAGMENT, DEADLINES_FRAGMENT)
+
+# Registro de mudança de coluna de uma tarefa
+def move_record(task_id, from_column, to_column):
+    record = {"op": "move", "id": task_id, "from": from_column, "to": to_column}
+    # A data de conclusão decide quando a tarefa vai para o arquivo morto
+    if to_column == "done":
+        record["fields"] = {"completed_at": datetime.now().isoformat()}
+    elif from_column == "done":
+        record["fields"] = {"completed_at": None}
+    return record
+
+# Função para mover tarefa entre colunas (callback do botão)
 def move_task(task_id, from_column, to_column):
-    data = load_data()
-    
-    # Encontrar e remover a tarefa da coluna original
-    task_to_move = None
-    for task in data["columns"][from_column]["tasks"]:
-        if task["id"] == task_id:
-            task_to_move = task
-            break
-    
-    if task_to_move:
-        data["columns"][from_column]["tasks"] = [
-            task for task in data["columns"][from_column]["tasks"] 
-            if task["id"] != task_id
-        ]
-        
-        # Adicionar à nova coluna
-        task_to_move["column"] = to_column
-        data["columns"][to_column]["tasks"].append(task_to_move)
-        save_data(data)
-        st.rerun()
+    if record_change(move_record(task_id, from_column, to_column)):
+        st.rerun([column_fragment(from_column), column_fragment(to_column), *SUMMARY_FRAGMENTS])
+    else:
+        st.warning("⚠️ Esta tarefa foi alterada por outra pessoa.")
 
-# Função para excluir tarefa
+# Função para excluir tarefa (callback do botão)
 def delete_task(task_id, column_key):
-    data = load_data()
-    data["columns"][column_key]["tasks"] = [
-        task for task in data["columns"][column_key]["tasks"] 
-        if task["id"] != task_id
+    if record_change({"op": "delete", "id": task_id, "column": column_key}):
+        st.rerun([column_fragment(column_key), *SUMMARY_FRAGMENTS])
+    else:
+        st.warning("⚠️ Esta tarefa foi alterada por outra pessoa.")
+
+# Abrir o formulário de edição (callback do botão)
+def start_edit(task_id):
+    st.session_state.editing.add(task_id)
+
+# Seleção de cards de uma coluna (estado do multiselect da barra de ações)
+def selection_key(column_key):
+    return f"selected_{column_key}"
+
+def take_selection(column_key):
+    # Devolve os ids selecionados e limpa a seleção
+    key = selection_key(column_key)
+    selected = st.session_state.get(key, [])
+    st.session_state[key] = []
+    return selected
+
+# Barra de ações: editar, excluir e mover as tarefas selecionadas (callbacks)
+def edit_selected(column_key):
+    st.session_state.editing.update(take_selection(column_key))
+
+def move_selected(column_key, to_column):
+    changed = [
+        task_id for task_id in take_selection(column_key)
+        if record_change(move_record(task_id, column_key, to_column))
     ]
-    save_data(data)
-    st.rerun()
+    if changed:
+        st.rerun([column_fragment(column_key), column_fragment(to_column), *SUMMARY_FRAGMENTS])
+    else:
+        st.warning("⚠️ As tarefas selecionadas foram alteradas por outra pessoa.")
+
+def delete_selected(column_key):
+    changed = [
+        task_id for task_id in take_selection(column_key)
+        if record_change({"op": "delete", "id": task_id, "column": column_key})
+    ]
+    st.session_state.editing.difference_update(changed)
+    if changed:
+        st.rerun([column_fragment(column_key), *SUMMARY_FRAGMENTS])
+    else:
+        st.warning("⚠️ As tarefas selecionadas foram alteradas por outra pessoa.")
+
+# Campo do formulário de edição de uma tarefa (lido pelo callback de salvar)
+def edit_key(task_id, field):
+    return f"edit_{field}_{task_id}"
+
+# Salvar a edição (callback do formulário): atualiza a coluna da tarefa e os
+# resumos (estatísticas e prazos), como mover e excluir
+def save_edit(task_id, column_key):
+    record_change({
+        "op": "update",
+        "id": task_id,
+        "column": column_key,
+        "fields": {
+            "title": st.session_state[edit_key(task_id, "title")],
+            "description": st.session_state[edit_key(task_id, "description")],
+            "priority": st.session_state[edit_key(task_id, "priority")],
+            "assignee": st.session_state[edit_key(task_id, "assignee")],
+            "due_date": st.session_state[edit_key(task_id, "due_date")].isoformat()
+        }
+    })
+    st.session_state.editing.discard(task_id)
+    st.rerun([column_fragment(column_key), *SUMMARY_FRAGMENTS])
+
+def cancel_edit(task_id, column_key):
+    st.session_state.editing.discard(task_id)
+    st.rerun([column_fragment(column_key)])
 
 # Função para editar tarefa
 def edit_task(task_id, current_column):
-    data = load_data()
-    task = next(
-        (t for t in data["columns"][current_column]["tasks"] 
-         if t["id"] == task_id), None
-    )
+    task = load_data().get(task_id)
     
-    if task:
+    if task is None:
+        # Excluída ou arquivada por outra sessão enquanto estava em edição
+        st.session_state.editing.discard(task_id)
+    else:
         with st.form(f"edit_task_{task_id}"):
             st.subheader("✏️ Editar Tarefa")
             
-            new_title = st.text_input("Título", value=task["title"])
-            new_description = st.text_area("Descrição", value=task.get("description", ""))
-            new_priority = st.selectbox(
+            st.text_input("Título", value=task["title"], key=edit_key(task_id, "title"))
+            st.text_area("Descrição", value=task.get("description", ""), key=edit_key(task_id, "description"))
+            st.selectbox(
                 "Prioridade", 
                 ["Alta", "Média", "Baixa"],
-                index=["Alta", "Média", "Baixa"].index(task.get("priority", "Média"))
+                index=["Alta", "Média", "Baixa"].index(task.priority_label),
+                key=edit_key(task_id, "priority")
             )
-            new_assignee = st.text_input("Responsável", value=task.get("assignee", ""))
+            st.text_input("Responsável", value=task.get("assignee", ""), key=edit_key(task_id, "assignee"))
             
-            due_date = task.get("due_date")
-            new_due_date = st.date_input(
+            st.date_input(
                 "Data de Vencimento",
-                value=datetime.fromisoformat(due_date) if due_date else datetime.now()
+                value=task.due or datetime.now(),
+                key=edit_key(task_id, "due_date")
             )
             
             col1, col2 = st.columns(2)
             
             with col1:
-                if st.form_submit_button("💾 Salvar Alterações"):
-                    task.update({
-                        "title": new_title,
-                        "description": new_description,
-                        "priority": new_priority,
-                        "assignee": new_assignee,
-                        "due_date": new_due_date.isoformat()
-                    })
-                    save_data(data)
-                    st.session_state[f"editing_{task['id']}"] = False
-                    st.rerun()
+                st.form_submit_button("💾 Salvar Alterações", on_click=save_edit, args=(task_id, current_column))
             
             with col2:
-                if st.form_submit_button("❌ Cancelar"):
-                    st.session_state[f"editing_{task['id']}"] = False
-                    st.rerun()
+                st.form_submit_button("❌ Cancelar", on_click=cancel_edit, args=(task_id, current_column))
 
 # Função para renderizar card da tarefa
-def render_task_card(task, column_key, column_index, all_columns):
-    priority_class = {
-        "Alta": "task-high",
-        "Média": "task-medium", 
-        "Baixa": "task-low"
-    }.get(task.get("priority", "Média"), "task-medium")
-    
-    priority_badge_class = {
-        "Alta": "priority-high",
-        "Média": "priority-medium", 
-        "Baixa": "priority-low"
-    }.get(task.get("priority", "Média"), "priority-medium")
-    
+def render_task_card(task, column_key, column_index, all_columns, due_status=None):
     # Card container
     with st.container():
-        # Título e informações no card
-        st.markdown(f'<div class="task-card {priority_class}">', unsafe_allow_html=True)
-        
-        # Badge de prioridade
-        st.markdown(f'<div class="priority-badge {priority_badge_class}">{task.get("priority", "Média")}</div>', unsafe_allow_html=True)
-        
-        # Título
-        st.markdown(f'<div class="task-title">{task["title"]}</div>', unsafe_allow_html=True)
-        
-        # Descrição
-        if task.get("description"):
-            desc = task['description']
-            if len(desc) > 80:
-                desc = desc[:80] + "..."
-            st.markdown(f'<div class="task-description">{desc}</div>', unsafe_allow_html=True)
-        
-        # Informações da tarefa
-        if task.get("assignee"):
-            st.markdown(f'<div class="task-info">👤 {task["assignee"]}</div>', unsafe_allow_html=True)
-        
-        if task.get("due_date"):
-            due_date = datetime.fromisoformat(task["due_date"]).strftime("%d/%m/%Y")
-            st.markdown(f'<div class="task-info">📅 {due_date}</div>', unsafe_allow_html=True)
-        
-        # Meta informações
-        created_date = datetime.fromisoformat(task["created_at"]).strftime("%d/%m")
-        st.markdown(f'<div class="task-meta">ID: #{task["id"]} • Criado: {created_date}</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Corpo do card num único elemento, com o HTML em cache (kanban_view)
+        st.markdown(kanban_view.card_html(task, due_status), unsafe_allow_html=True)
         
         # Botões de ação (menores)
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("✏️", key=f"edit_{task['id']}", help="Editar", use_container_width=True, type="secondary"):
-                st.session_state[f"editing_{task['id']}"] = True
+            st.button("✏️", key=f"edit_{task['id']}", help="Editar", use_container_width=True, type="secondary",
+                      on_click=start_edit, args=(task["id"],))
         with col2:
-            if st.button("🗑️", key=f"delete_{task['id']}", help="Excluir", use_container_width=True, type="secondary"):
-                delete_task(task["id"], column_key)
+            st.button("🗑️", key=f"delete_{task['id']}", help="Excluir", use_container_width=True, type="secondary",
+                      on_click=delete_task, args=(task["id"], column_key))
         
         # Botões de movimento
         column_keys = list(all_columns.keys())
@@ -380,96 +368,275 @@ def render_task_card(task, column_key, column_index, all_columns):
             with col_left:
                 if column_index > 0:
                     prev_column = column_keys[column_index - 1]
-                    if st.button("⬅️", key=f"left_{task['id']}", 
-                               help=f"Mover para {all_columns[prev_column]['name']}",
-                               use_container_width=True, type="primary"):
-                        move_task(task["id"], column_key, prev_column)
+                    st.button("⬅️", key=f"left_{task['id']}", 
+                              help=f"Mover para {all_columns[prev_column].name}",
+                              use_container_width=True, type="primary",
+                              on_click=move_task, args=(task["id"], column_key, prev_column))
             
             with col_right:
                 if column_index < len(column_keys) - 1:
                     next_column = column_keys[column_index + 1]
-                    if st.button("➡️", key=f"right_{task['id']}", 
-                               help=f"Mover para {all_columns[next_column]['name']}",
-                               use_container_width=True, type="primary"):
-                        move_task(task["id"], column_key, next_column)
-        
-        # Modal de edição
-        if st.session_state.get(f"editing_{task['id']}", False):
-            edit_task(task["id"], column_key)
+                    st.button("➡️", key=f"right_{task['id']}", 
+                              help=f"Mover para {all_columns[next_column].name}",
+                              use_container_width=True, type="primary",
+                              on_click=move_task, args=(task["id"], column_key, next_column))
+
+# Barra de ações da coluna: uma seleção e quatro botões, qualquer que seja o
+# número de cards
+def render_action_bar(column_key, column_index, all_columns, tasks):
+    titles = {task.id: task.get("title") for task in tasks}
+    key = selection_key(column_key)
+    # Tarefas que saíram da coluna (ou da parte exibida) deixam a seleção
+    if key in st.session_state:
+        st.session_state[key] = [task_id for task_id in st.session_state[key] if task_id in titles]
+
+    selected = st.multiselect(
+        "Selecionar tarefas", list(titles), key=key,
+        format_func=lambda task_id: f"#{task_id} {titles[task_id]}",
+        placeholder="Selecionar tarefas", label_visibility="collapsed"
+    )
+
+    column_keys = list(all_columns.keys())
+    prev_column = column_keys[column_index - 1] if column_index > 0 else None
+    next_column = column_keys[column_index + 1] if column_index < len(column_keys) - 1 else None
+
+    col1, col2, col_left, col_right = st.columns(4)
+    with col1:
+        st.button("✏️", key=f"edit_{column_key}", help="Editar selecionadas", use_container_width=True,
+                  type="secondary", disabled=not selected, on_click=edit_selected, args=(column_key,))
+    with col2:
+        st.button("🗑️", key=f"delete_{column_key}", help="Excluir selecionadas", use_container_width=True,
+                  type="secondary", disabled=not selected, on_click=delete_selected, args=(column_key,))
+    with col_left:
+        st.button("⬅️", key=f"left_{column_key}",
+                  help=f"Mover para {all_columns[prev_column].name}" if prev_column else None,
+                  use_container_width=True, type="primary", disabled=not selected or prev_column is None,
+                  on_click=move_selected, args=(column_key, prev_column))
+    with col_right:
+        st.button("➡️", key=f"right_{column_key}",
+                  help=f"Mover para {all_columns[next_column].name}" if next_column else None,
+                  use_container_width=True, type="primary", disabled=not selected or next_column is None,
+                  on_click=move_selected, args=(column_key, next_column))
+
+# "Carregar mais": o clique já redesenha só o fragment da coluna
+def show_more(column_key, visible):
+    st.session_state[f"visible_{column_key}"] = visible + PAGE_SIZE
+
+# Renderizar uma coluna (fragment: redesenhada sozinha)
+def render_column(column_key, idx):
+    data = load_data()
+    column_data = data.columns[column_key]
+    visible = st.session_state.get(f"visible_{column_key}", PAGE_SIZE)
+
+    # Header da coluna (a contagem depende dos filtros, calculada abaixo)
+    header = st.empty()
+    sort_mode = st.selectbox(
+        "Ordenar", kanban_board.SORT_MODES, format_func=SORT_LABELS.get,
+        key=f"sort_{column_key}", label_visibility="collapsed"
+    )
+
+    # Sem filtro, a coluna já mantém cada ordenação; com filtro ativo, só as
+    # tarefas filtradas são ordenadas (manual: ordem de criação)
+    matches = filtered_ids(data)
+    if matches is None:
+        total = len(column_data)
+        count = f"{total}"
+        tasks = column_data.ordered(sort_mode, 0, visible)
+    else:
+        ids = sorted(task_id for task_id in matches if data.column_of(task_id) == column_key)
+        total = len(ids)
+        count = f"{total} de {len(column_data)}"
+        tasks = [data.get(task_id) for task_id in ids]
+        if sort_mode in kanban_board.SORT_KEYS:
+            tasks.sort(key=kanban_board.SORT_KEYS[sort_mode])
+        tasks = tasks[:visible]
+
+    header.markdown(
+        f'<div class="column-header">{column_data.name} ({count})</div>', 
+        unsafe_allow_html=True
+    )
+    
+    # Área de tasks da coluna: só os primeiros cards, para o número de
+    # elementos na página não crescer com a coluna
+    if total:
+        editing = st.session_state.editing
+        # Destaque de atrasadas e próximas do vencimento (consulta O(1) por card)
+        deadlines = data.deadlines()
+        today = datetime.now().date()
+        if ACTION_BAR:
+            render_action_bar(column_key, idx, data.columns, tasks)
+        for task in tasks:
+            # Verificar se está editando
+            if task.id in editing:
+                edit_task(task["id"], column_key)
+                continue
+            due_status = deadlines.status(task.id, today, DUE_SOON_DAYS)
+            if ACTION_BAR:
+                st.markdown(kanban_view.card_html(task, due_status), unsafe_allow_html=True)
+            else:
+                render_task_card(task, column_key, idx, data.columns, due_status)
+
+        hidden = total - visible
+        if hidden > 0:
+            st.caption(f"{hidden} tarefas ocultas")
+            st.button("⬇️ Carregar mais", key=f"more_{column_key}", use_container_width=True,
+                      on_click=show_more, args=(column_key, visible))
+    else:
+        st.markdown(
+            '<div class="empty-column">📭 Nenhuma tarefa</div>', 
+            unsafe_allow_html=True
+        )
 
 # Renderizar o Kanban
 def render_kanban():
     data = load_data()
     
     # Criar colunas
-    columns = st.columns(len(data["columns"]))
+    columns = st.columns(len(data.columns))
     
-    for idx, (column_key, column_data) in enumerate(data["columns"].items()):
+    for idx, column_key in enumerate(data.columns):
         with columns[idx]:
-            # Header da coluna
-            st.markdown(
-                f'<div class="column-header">{column_data["name"]} ({len(column_data["tasks"])})</div>', 
-                unsafe_allow_html=True
-            )
-            
-            # Área de tasks da coluna
-            if column_data["tasks"]:
-                for task in column_data["tasks"]:
-                    # Verificar se está editando
-                    if not st.session_state.get(f"editing_{task['id']}", False):
-                        render_task_card(task, column_key, idx, data["columns"])
-                    else:
-                        edit_task(task["id"], column_key)
-            else:
-                st.markdown(
-                    '<div class="empty-column">📭 Nenhuma tarefa</div>', 
-                    unsafe_allow_html=True
-                )
+            st.fragment(render_column, key=column_fragment(column_key))(column_key, idx)
+
+# Busca de tarefas (fragment: digitar não redesenha o board). O índice
+# invertido do board é atualizado a cada mutação, sem ser refeito
+@st.fragment
+def render_search():
+    query = st.text_input(
+        "🔍 Buscar tarefas", placeholder="Título, descrição ou responsável", key="search_query"
+    )
+    if not query.strip():
+        return
+    data = load_data()
+    results = data.search(query, SEARCH_LIMIT)
+    if not results:
+        st.caption("Nenhuma tarefa encontrada.")
+    for task in results:
+        column = data.columns[data.column_of(task.id)]
+        st.markdown(
+            f"**#{task.id} {task['title']}** · {column.name}"
+            f" · {task.get('assignee') or 'Não atribuído'}"
+        )
+
+render_search()
 
 # Renderizar a aplicação
 render_kanban()
 
-# Estatísticas
-st.markdown("---")
-st.subheader("📊 Estatísticas do Projeto")
+# Estatísticas (fragment: redesenhado junto com as colunas alteradas)
+@st.fragment(key=STATS_FRAGMENT)
+def render_stats():
+    st.markdown("---")
+    st.subheader("📊 Estatísticas do Projeto")
+
+    data = load_data()
+    # As tarefas arquivadas continuam contando como concluídas
+    total_tasks = len(data) + data.archived
+    completed = len(data.columns["done"]) + data.archived
+    in_progress = len(data.columns["in_progress"]) + len(data.columns["review"])
+    backlog = len(data.columns["backlog"]) + len(data.columns["to_do"])
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.metric("Total de Tarefas", total_tasks)
+
+    with col2:
+        st.metric("Concluídas", completed)
+
+    with col3:
+        st.metric("Em Andamento", in_progress)
+
+    with col4:
+        st.metric("Pendentes", backlog)
+
+    with col5:
+        progress = (completed / total_tasks * 100) if total_tasks > 0 else 0
+        st.metric("Progresso Geral", f"{progress:.1f}%")
 
-data = load_data()
-total_tasks = sum(len(col["tasks"]) for col in data["columns"].values())
-completed = len(data["columns"]["done"]["tasks"])
-in_progress = len(data["columns"]["in_progress"]["tasks"]) + len(data["columns"]["review"]["tasks"])
-backlog = len(data["columns"]["backlog"]["tasks"]) + len(data["columns"]["to_do"]["tasks"])
+render_stats()
 
-col1, col2, col3, col4, col5 = st.columns(5)
+# Painel de prazos (fragment na sidebar, redesenhado junto com as estatísticas)
+def deadline_text(data, due, task_id):
+    task = data.get(task_id)
+    due_text = datetime.fromordinal(due).strftime("%d/%m/%Y")
+    return f"#{task_id} {task['title'] if task else ''} · {due_text}"
 
-with col1:
-    st.metric("Total de Tarefas", total_tasks)
+def deadline_list(data, entries):
+    st.markdown("\n".join(f"- {deadline_text(data, due, task_id)}" for due, task_id in entries))
 
-with col2:
-    st.metric("Concluídas", completed)
+def render_deadlines():
+    data = load_data()
+    deadlines = data.deadlines()
+    today = datetime.now().date()
+
+    st.subheader("⏰ Prazos")
+    overdue, first_overdue = deadlines.overdue(today, DEADLINE_LIST)
+    if overdue:
+        st.error(f"{overdue} tarefas atrasadas")
+        deadline_list(data, first_overdue)
+    else:
+        st.success("Nenhuma tarefa atrasada")
+
+    soon, first_soon = deadlines.due_within(today, DUE_SOON_DAYS, DEADLINE_LIST)
+    if soon:
+        st.warning(f"{soon} tarefas vencem nos próximos {DUE_SOON_DAYS} dias")
+        deadline_list(data, first_soon)
 
-with col3:
-    st.metric("Em Andamento", in_progress)
+    next_deadline = deadlines.next_deadline(today)
+    if next_deadline is not None:
+        st.caption(f"Próximo prazo: {deadline_text(data, *next_deadline)}")
 
-with col4:
-    st.metric("Pendentes", backlog)
+with st.sidebar:
+    st.markdown("---")
+    st.fragment(render_deadlines, key=DEADLINES_FRAGMENT)()
+
+# Arquivo morto: busca pelo índice, sem carregar os segmentos
+st.sidebar.markdown("---")
+st.sidebar.subheader(f"🗄️ Arquivo ({len(archive)} tarefas)")
+archive_query = st.sidebar.text_input("Buscar no arquivo", placeholder="Título ou responsável")
+for summary in archive.search(archive_query):
+    completed_date = kanban_archive.completed_at(summary)
+    st.sidebar.markdown(
+        f"**{summary['title']}** · {summary.get('assignee') or 'Não atribuído'}"
+        f" · concluída em {completed_date.strftime('%d/%m/%Y') if completed_date else '-'}"
+    )
 
-with col5:
-    progress = (completed / total_tasks * 100) if total_tasks > 0 else 0
-    st.metric("Progresso Geral", f"{progress:.1f}%")
+# Histórico: o board como estava numa data e hora passadas
+st.sidebar.markdown("---")
+st.sidebar.subheader("🕒 Histórico")
+history_date = st.sidebar.date_input("Board em", value=datetime.now(), key="history_date")
+history_time = st.sidebar.time_input("Hora", value=datetime.now().time(), key="history_time")
+# Reconstruir o board custa ler um snapshot e reaplicar eventos: só quando
+# pedido, e o resultado fica na sessão. Depois do último evento registrado,
+# o board atual já é a resposta
+if st.sidebar.button("🔍 Consultar Histórico", use_container_width=True):
+    history_when = datetime.combine(history_date, history_time)
+    past_board = load_data() if history.is_current(history_when) else history.board_as_of(history_when)
+    st.session_state.history_counts = None if past_board is None else [
+        (column.name, len(column)) for column in past_board.columns.values()
+    ]
+    st.session_state.history_when = history_when
+if "history_counts" in st.session_state:
+    st.sidebar.caption(f"Board em {st.session_state.history_when.strftime('%d/%m/%Y %H:%M')}")
+    if st.session_state.history_counts is None:
+        st.sidebar.info("Não há histórico antes dessa data.")
+    else:
+        for name, count in st.session_state.history_counts:
+            st.sidebar.markdown(f"**{name}:** {count}")
 
 # Exportação e limpeza de dados
 st.sidebar.markdown("---")
 st.sidebar.subheader("⚙️ Configurações")
 
 if st.sidebar.button("📤 Exportar Dados JSON", use_container_width=True):
-    with open(DATA_FILE, "r") as f:
-        st.sidebar.download_button(
-            label="📥 Baixar Arquivo JSON",
-            data=f.read(),
-            file_name="kanban_turis_trafego.json",
-            mime="application/json",
-            use_container_width=True
-        )
+    st.sidebar.download_button(
+        label="📥 Baixar Arquivo JSON",
+        data=store.export_json(),
+        file_name="kanban_turis_trafego.json",
+        mime="application/json",
+        use_container_width=True
+    )
 
 if st.sidebar.button("🔄 Reiniciar Board", use_container_width=True):
     if st.sidebar.confirm("Tem certeza? Todos os dados serão perdidos."):
@@ -502,9 +669,4 @@ with st.expander("ℹ️ Como usar o Kanban"):
     ```
     Backlog → A Fazer → Em Progresso → Revisão → Concluído
     ```
-    """)
-
-# Inicializar session state para edição
-for key in st.session_state.keys():
-    if key.startswith('editing_'):
-        st.session_state[key] = False
\ No newline at end of file
+    """)
\ No newline at end of file
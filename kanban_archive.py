@@ -0,0 +1,239 @@
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import kanban_store
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem lock entre processos, só entre as sessões do mesmo processo
+    fcntl = None
+
+# Arquivo morto das tarefas concluídas.
+#
+# Tarefas concluídas há mais de N dias saem do board "quente" para segmentos
+# imutáveis, comprimidos com gzip e particionados pelo mês de conclusão, no
+# diretório "<arquivo do board>.archive/": cada execução grava, para cada mês,
+# um segmento novo "AAAA-MM/NNNN.json.gz" e nunca reescreve os anteriores.
+#
+# O index.json lista os segmentos e guarda um resumo de cada tarefa arquivada
+# (título, responsável, prioridade, datas e o segmento onde ela está). Busca e
+# estatísticas usam só o índice; o segmento só é aberto para ler a tarefa
+# completa. No board fica apenas a contagem de arquivadas (board.archived).
+#
+# Ordem de gravação: primeiro segmentos e índice, depois o registro "archive"
+# que tira as tarefas do board. Se o processo cair no meio, as tarefas ficam
+# nos dois lugares por um tempo; a próxima execução vê que os ids já estão no
+# índice, não os grava de novo e só os remove do board.
+#
+# Os resumos ficam no índice em ordem de conclusão (as novas entram no lugar
+# certo com bisect), e a gravação de segmentos e índice acontece sob um lock
+# fcntl em "<arquivo do board>.archive/.lock", compartilhado entre processos.
+ARCHIVE_SUFFIX = ".archive"
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+SEGMENT_FORMAT = "gzip"
+ARCHIVE_BATCH = 500
+MAX_RETRIES = 3
+
+# Campos copiados para o resumo da tarefa no índice
+SUMMARY_FIELDS = ("title", "assignee", "priority", "due_date", "created_at", "completed_at")
+
+
+def completed_at(task):
+    """Data de conclusão da tarefa (tarefas antigas usam a data de criação)."""
+    value = task.get("completed_at") or task.get("created_at")
+    return datetime.fromisoformat(value) if value else None
+
+
+def _summary_key(summary):
+    return summary.get("completed_at") or ""
+
+
+class TaskArchive:
+    """Segmentos de tarefas arquivadas e o índice que os descreve."""
+
+    def __init__(self, board_path):
+        self.path = board_path + ARCHIVE_SUFFIX
+        self.index_path = os.path.join(self.path, INDEX_FILE)
+        self.lock_path = os.path.join(self.path, LOCK_FILE)
+        self.last_run = 0.0
+        self._lock = threading.RLock()
+        self._index = None
+        self._signature = None
+
+    @staticmethod
+    def _signature_of(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load_index(self):
+        # Só relê o índice quando ele muda em disco
+        with self._lock:
+            signature = self._signature_of(self.index_path)
+            if self._index is None or signature != self._signature:
+                if signature is None:
+                    index = {"segments": [], "tasks": []}
+                else:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                # Índices gravados antes da ordenação; já em ordem, sort() é linear
+                index["tasks"].sort(key=_summary_key)
+                self._set_index(index, signature)
+            return self._index
+
+    def _set_index(self, index, signature):
+        index["by_id"] = {summary["id"]: summary for summary in index["tasks"]}
+        self._index = index
+        self._signature = signature
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """Gravação exclusiva entre threads e, via fcntl, entre processos."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self._load_index()["tasks"])
+
+    def __contains__(self, task_id):
+        return task_id in self._load_index()["by_id"]
+
+    def summaries(self):
+        """Resumos das tarefas arquivadas, das concluídas mais recentemente às mais antigas."""
+        return self._load_index()["tasks"][::-1]
+
+    def search(self, text, limit=50):
+        """Busca arquivadas pelo título ou responsável (sem abrir os segmentos)."""
+        text = text.strip().lower()
+        if not text:
+            return []
+        found = []
+        for summary in reversed(self._load_index()["tasks"]):
+            if text in (summary.get("title") or "").lower() or text in (summary.get("assignee") or "").lower():
+                found.append(summary)
+                if len(found) == limit:
+                    break
+        return found
+
+    def get(self, task_id):
+        """Lê do segmento a tarefa arquivada completa (ou None)."""
+        summary = self._load_index()["by_id"].get(task_id)
+        if summary is None:
+            return None
+        tasks = kanban_store.read_snapshot(os.path.join(self.path, summary["segment"]))
+        for task in tasks:
+            if task["id"] == task_id:
+                return task
+        return None
+
+    def add(self, tasks):
+        """Grava as tarefas em segmentos novos e as registra no índice.
+
+        Tarefas já arquivadas são ignoradas. Retorna quantas foram gravadas.
+        """
+        with self._write_lock():
+            # Relido sob o lock: outro processo pode ter arquivado antes
+            index = self._load_index()
+            by_month = {}
+            for task in tasks:
+                if task["id"] in index["by_id"]:
+                    continue
+                when = completed_at(task)
+                month = when.strftime("%Y-%m") if when else "sem-data"
+                by_month.setdefault(month, []).append(task)
+            if not by_month:
+                return 0
+
+            segments = list(index["segments"])
+            summaries = list(index["tasks"])
+            for month, month_tasks in sorted(by_month.items()):
+                month_dir = os.path.join(self.path, month)
+                os.makedirs(month_dir, exist_ok=True)
+                sequence = sum(1 for segment in segments if segment["month"] == month) + 1
+                name = f"{month}/{sequence:04d}.json.gz"
+                kanban_store.write_snapshot(os.path.join(self.path, name), month_tasks, SEGMENT_FORMAT)
+                segments.append({"file": name, "month": month, "count": len(month_tasks)})
+                for task in month_tasks:
+                    summary = {field: task.get(field) for field in SUMMARY_FIELDS}
+                    summary["id"] = task["id"]
+                    summary["segment"] = name
+                    bisect.insort(summaries, summary, key=_summary_key)
+
+            index = {"segments": segments, "tasks": summaries}
+            kanban_store.write_snapshot(self.index_path, index)
+            self._set_index(index, self._signature_of(self.index_path))
+            return sum(len(month_tasks) for month_tasks in by_month.values())
+
+
+def archive_column(store, archive, column_key, max_age_days, now=None):
+    """Arquiva as tarefas da coluna concluídas há mais de max_age_days dias.
+
+    Retorna quantas tarefas saíram do board.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=max_age_days)
+    for _ in range(MAX_RETRIES):
+        board = store.load()
+        version = board.version
+        old = []
+        for task in board.columns[column_key]:
+            when = task.completed or task.created
+            if when is not None and when < cutoff:
+                old.append(task.to_dict())
+        if not old:
+            return 0
+
+        archive.add(old)
+        ids = [task["id"] for task in old]
+        try:
+            # Cada lote é um registro no journal; só o primeiro confere a versão
+            for start in range(0, len(ids), ARCHIVE_BATCH):
+                store.apply(
+                    {"op": "archive", "column": column_key, "ids": ids[start:start + ARCHIVE_BATCH]},
+                    expected_version=version if start == 0 else None
+                )
+        except kanban_store.ConflictError:
+            continue
+        return len(ids)
+    return 0
+
+
+def archive_if_due(store, archive, column_key, max_age_days, interval):
+    """Roda archive_column no máximo uma vez a cada interval segundos."""
+    if archive.last_run and time.monotonic() - archive.last_run < interval:
+        return 0
+    archive.last_run = time.monotonic()
+    return archive_column(store, archive, column_key, max_age_days)
+
+
+# Um arquivo morto por board, compartilhado pelas sessões do processo
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def open_archive(board_path):
+    """Retorna o arquivo morto do board (um por arquivo no processo)."""
+    key = os.path.abspath(board_path)
+    with _archives_lock:
+        archive = _archives.get(key)
+        if archive is None:
+            archive = TaskArchive(board_path)
+            _archives[key] = archive
+        return archive
@@ -0,0 +1,625 @@
+# Modelo em memória do board Kanban.
+#
+# Cada coluna guarda suas tarefas num dict id -> tarefa, que preserva a ordem
+# de inserção (a posição do card na coluna) e permite remover qualquer tarefa
+# em O(1). O board mantém ainda o índice id -> coluna, atualizado em toda
+# mutação, de modo que localizar, mover, editar e excluir uma tarefa custam
+# tempo constante, sem varrer nem recriar a lista da coluna.
+#
+# Além da ordem de inserção ("manual"), cada coluna pode exibir as tarefas
+# por prioridade e vencimento, por vencimento ou por criação. A lista
+# ordenada de cada modo é montada no primeiro uso e mantida a cada inserção,
+# remoção ou edição com bisect, sem reordenar a coluna inteira.
+#
+# Uma coluna pode ser preguiçosa (LazyColumn): o board é montado só com o nome,
+# os ids e a contagem de cada coluna, e as tarefas são lidas do disco no
+# primeiro acesso. Contagens, o índice id -> coluna e os prazos (os pares
+# vencimento/id de cada coluna também vão no cabeçalho) não materializam nada.
+#
+# Tarefas antigas podem sair do board para o arquivo morto (kanban_archive);
+# o board guarda só quantas foram arquivadas (archived).
+#
+# A busca por texto usa um índice invertido (kanban_search); os filtros,
+# índices de responsável, prioridade e vencimento, e os prazos das tarefas em
+# aberto usam kanban_filter. Cada um é montado no primeiro uso e, daí em
+# diante, atualizado a cada mutação do board.
+#
+# As tarefas são objetos Task com __slots__: prioridade como enum, chave de
+# coluna e responsável internados (uma única string por valor em todo o
+# board) e datas já convertidas (due_date como ordinal do dia, created_at e
+# completed_at como datetime). A conversão para o layout JSON é sem perdas:
+# campos desconhecidos ficam em extra, e datas que não voltariam idênticas ao
+# texto original são guardadas como texto.
+
+import bisect
+import enum
+import sys
+import threading
+from datetime import date, datetime
+
+import kanban_filter
+import kanban_search
+
+
+class Priority(enum.Enum):
+    ALTA = "Alta"
+    MEDIA = "Média"
+    BAIXA = "Baixa"
+
+
+# Valores possíveis de Priority, para tradução rápida do texto gravado
+_PRIORITIES = {priority.value: priority for priority in Priority}
+
+# Marca de campo ausente no dict original (diferente de um campo com None)
+_MISSING = object()
+
+# Posição de cada prioridade na ordenação (sem prioridade conta como Média)
+_PRIORITY_RANK = {Priority.ALTA: 0, Priority.MEDIA: 1, Priority.BAIXA: 2}
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _parse_ordinal(value):
+    # Data ISO (AAAA-MM-DD) -> ordinal do dia, se a volta for idêntica
+    if isinstance(value, str):
+        try:
+            ordinal = date.fromisoformat(value).toordinal()
+        except ValueError:
+            return value
+        if date.fromordinal(ordinal).isoformat() == value:
+            return ordinal
+    return value
+
+
+def _parse_datetime(value):
+    # Data e hora ISO -> datetime, se a volta for idêntica
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        if parsed.isoformat() == value:
+            return parsed
+    return value
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return None
+
+
+class Task:
+    """Tarefa do board.
+
+    Os atributos guardam os valores já convertidos; task["campo"], get() e
+    update() falam o layout JSON (textos), como o dict de antes.
+    """
+
+    __slots__ = (
+        "id", "title", "description", "priority", "assignee",
+        "due_date", "created_at", "completed_at", "column", "extra", "view"
+    )
+
+    # Campos com slot próprio, na ordem do layout JSON
+    FIELDS = (
+        "id", "title", "description", "priority", "assignee",
+        "due_date", "created_at", "completed_at", "column"
+    )
+
+    def __init__(self, data):
+        # view: dados de exibição derivados pela interface (kanban_view),
+        # descartados a cada alteração da tarefa
+        self.view = None
+        self.extra = None
+        for field in self.FIELDS:
+            setattr(self, field, _MISSING)
+        self.update(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    def to_dict(self):
+        """Converte para o layout JSON (dict novo)."""
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not _MISSING:
+                data[field] = self._export(field, value)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @staticmethod
+    def _export(field, value):
+        if isinstance(value, Priority):
+            return value.value
+        if field == "due_date" and isinstance(value, int):
+            return date.fromordinal(value).isoformat()
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def __setitem__(self, field, value):
+        self.view = None
+        if field == "priority":
+            value = _PRIORITIES.get(value, value)
+        elif field in ("assignee", "column"):
+            value = _intern(value)
+        elif field == "due_date":
+            value = _parse_ordinal(value)
+        elif field in ("created_at", "completed_at"):
+            value = _parse_datetime(value)
+        elif field not in self.FIELDS:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+            return
+        setattr(self, field, value)
+
+    def __getitem__(self, field):
+        if field in self.FIELDS:
+            value = getattr(self, field)
+            if value is _MISSING:
+                raise KeyError(field)
+            return self._export(field, value)
+        if self.extra is None:
+            raise KeyError(field)
+        return self.extra[field]
+
+    def __contains__(self, field):
+        if field in self.FIELDS:
+            return getattr(self, field) is not _MISSING
+        return self.extra is not None and field in self.extra
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def update(self, fields):
+        for field, value in fields.items():
+            self[field] = value
+
+    @property
+    def due(self):
+        """Data de vencimento (date) ou None."""
+        value = self.due_date
+        if isinstance(value, int):
+            return date.fromordinal(value)
+        if isinstance(value, str):
+            # Texto fora do formato canônico: só aqui é preciso interpretar
+            return datetime.fromisoformat(value).date()
+        return None
+
+    @property
+    def created(self):
+        """Data de criação (datetime) ou None."""
+        return _as_datetime(self.created_at)
+
+    @property
+    def completed(self):
+        """Data de conclusão (datetime) ou None."""
+        return _as_datetime(self.completed_at)
+
+    @property
+    def priority_label(self):
+        """Prioridade como texto ("Média" quando não informada)."""
+        value = self.priority
+        if isinstance(value, Priority):
+            return value.value
+        return value if isinstance(value, str) else Priority.MEDIA.value
+
+
+def _due_key(task):
+    # Tarefas sem vencimento (ou com data ilegível) ficam por último
+    try:
+        due = task.due
+    except ValueError:
+        due = None
+    return (0, due.toordinal()) if due is not None else (1, 0)
+
+
+def _created_key(task):
+    created = task.created_at
+    if isinstance(created, datetime):
+        return created.isoformat()
+    return created if isinstance(created, str) else ""
+
+
+# Chave de ordenação de cada modo; o id no fim desempata e torna a entrada
+# única na lista ordenada. "manual" é a ordem de inserção da coluna
+SORT_KEYS = {
+    "priority": lambda task: (_PRIORITY_RANK.get(task.priority, 1),) + _due_key(task) + (task.id,),
+    "due": lambda task: _due_key(task) + (task.id,),
+    "created": lambda task: (_created_key(task), task.id)
+}
+SORT_MODES = ("manual",) + tuple(SORT_KEYS)
+
+
+class Column:
+    """Coluna do board: nome e tarefas em ordem de exibição."""
+
+    def __init__(self, key, name, tasks=()):
+        self.key = key
+        self.name = name
+        self.tasks = {}
+        self._init_orders()
+        for task in tasks:
+            self.put(task)
+
+    def _init_orders(self):
+        # Modo -> lista ordenada de entradas (chave..., id), e a entrada atual
+        # de cada tarefa em cada modo
+        self._orders = {}
+        self._entries = {}
+        self._orders_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __bool__(self):
+        return bool(self.tasks)
+
+    def __iter__(self):
+        # Itera sobre uma cópia rasa: outra sessão pode alterar a coluna
+        # enquanto esta renderiza (list() sobre o dict é atômico sob o GIL)
+        return iter(list(self.tasks.values()))
+
+    def task_ids(self):
+        """Ids das tarefas da coluna, em ordem."""
+        return list(self.tasks)
+
+    def window(self, start, stop):
+        """Tarefas da posição start até stop (exclusive), em ordem."""
+        # list() sobre o dict é atômico sob o GIL; fatiar depois é seguro
+        return list(self.tasks.values())[start:stop]
+
+    def due_entries(self):
+        """Pares [vencimento (ordinal do dia), id] das tarefas com vencimento."""
+        entries = []
+        for task in self:
+            due = kanban_filter.due_ordinal(task)
+            if due is not None:
+                entries.append([due, task.id])
+        return entries
+
+    def put(self, task):
+        """Coloca a tarefa (Task ou dict) no fim da coluna."""
+        task = Task.from_dict(task)
+        self.tasks[task.id] = task
+        self.refresh(task)
+        return task
+
+    def remove(self, task_id):
+        """Tira a tarefa da coluna e a retorna."""
+        tasks = self.tasks
+        # Sai do dict sob a mesma trava das ordenações: a primeira montagem
+        # de um modo (ordered) lê as tarefas sob essa trava, e a tarefa não
+        # pode sumir do dict e continuar na ordenação recém-montada
+        with self._orders_lock:
+            task = tasks.pop(task_id)
+            for mode, order in self._orders.items():
+                entry = self._entries[mode].pop(task_id, None)
+                if entry is not None:
+                    del order[bisect.bisect_left(order, entry)]
+        return task
+
+    def refresh(self, task):
+        """Posiciona a tarefa nas ordenações (depois de inserida ou editada)."""
+        with self._orders_lock:
+            for mode, order in self._orders.items():
+                entry = SORT_KEYS[mode](task)
+                old = self._entries[mode].get(task.id)
+                if old == entry:
+                    continue
+                if old is not None:
+                    del order[bisect.bisect_left(order, old)]
+                bisect.insort(order, entry)
+                self._entries[mode][task.id] = entry
+
+    def ordered(self, mode, start, stop):
+        """Tarefas da posição start até stop (exclusive) na ordem do modo."""
+        if mode not in SORT_KEYS:
+            return self.window(start, stop)
+        tasks = self.tasks
+        with self._orders_lock:
+            order = self._orders.get(mode)
+            if order is None:
+                # Primeiro uso do modo: ordena uma vez; depois, só bisect
+                entries = {task.id: SORT_KEYS[mode](task) for task in list(tasks.values())}
+                order = sorted(entries.values())
+                self._entries[mode] = entries
+                self._orders[mode] = order
+            ids = [entry[-1] for entry in order[start:stop]]
+        return [tasks[task_id] for task_id in ids if task_id in tasks]
+
+
+class LazyColumn(Column):
+    """Coluna cujas tarefas só são lidas no primeiro acesso.
+
+    segment é um chamável que devolve a lista de tarefas da coluna; o store
+    também o usa para copiar a coluna ainda não lida sem decodificá-la. due
+    são os pares [vencimento, id] do cabeçalho (None em snapshots antigos).
+    """
+
+    def __init__(self, key, name, ids, segment, due=None):
+        self.key = key
+        self.name = name
+        self.segment = segment
+        self._ids = list(ids)
+        self._due = due
+        self._added = {}
+        self._tasks = None
+        self._loading = threading.Lock()
+        self._init_orders()
+
+    @property
+    def pristine(self):
+        """Indica se a coluna continua idêntica ao segmento (nem lida, nem alterada)."""
+        return self._tasks is None and not self._added
+
+    @property
+    def tasks(self):
+        if self._tasks is None:
+            with self._loading:
+                if self._tasks is None:
+                    tasks = {}
+                    for data in self.segment():
+                        task = Task(data)
+                        tasks[task.id] = task
+                    tasks.update(self._added)
+                    self._tasks = tasks
+        return self._tasks
+
+    def __len__(self):
+        if self._tasks is None:
+            return len(self._ids)
+        return len(self._tasks)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def task_ids(self):
+        if self._tasks is None:
+            return list(self._ids)
+        return list(self._tasks)
+
+    def due_entries(self):
+        with self._loading:
+            if self._tasks is None and self._due is not None:
+                # Ainda não lida: os pares do cabeçalho mais os das tarefas
+                # que chegaram depois
+                entries = list(self._due)
+                for task in self._added.values():
+                    due = kanban_filter.due_ordinal(task)
+                    if due is not None:
+                        entries.append([due, task.id])
+                return entries
+        return super().due_entries()
+
+    def put(self, task):
+        # Tarefas que chegam a uma coluna ainda não lida (por exemplo, cards
+        # movidos para "Concluído") não obrigam a ler a coluna inteira
+        task = Task.from_dict(task)
+        with self._loading:
+            if self._tasks is None:
+                self._added[task.id] = task
+                self._ids.append(task.id)
+                return task
+        self._tasks[task.id] = task
+        self.refresh(task)
+        return task
+
+
+class Board:
+    """Board com as colunas em ordem e o índice id -> coluna das tarefas."""
+
+    def __init__(self, columns, last_id=0, version=0, archived=0):
+        self.columns = {column.key: column for column in columns}
+        self.last_id = last_id
+        self.version = version
+        self.archived = archived
+        self._index = {
+            task_id: column.key
+            for column in columns
+            for task_id in column.task_ids()
+        }
+        self._search = None
+        self._filters = None
+        self._deadlines = None
+        self._indexes_lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria o board a partir do layout JSON {"columns": {...}, "last_id": N}."""
+        last_id = data.get("last_id", 0)
+        max_id = max(
+            [last_id] + [task["id"] for column in data["columns"].values() for task in column["tasks"]]
+        )
+
+        # Versões antigas podiam gerar ids repetidos em criações concorrentes;
+        # as duplicatas recebem um id novo para o índice continuar único
+        seen = set()
+        columns = []
+        for key, column in data["columns"].items():
+            for task in column["tasks"]:
+                if task["id"] in seen:
+                    max_id += 1
+                    task["id"] = max_id
+                seen.add(task["id"])
+            columns.append(Column(key, column["name"], column["tasks"]))
+
+        return cls(columns, max_id, data.get("version", 0), data.get("archived", 0))
+
+    def to_dict(self):
+        """Converte o board para o layout JSON (dicts novos para as tarefas)."""
+        return {
+            "columns": {
+                key: {"name": column.name, "tasks": [task.to_dict() for task in column]}
+                for key, column in self.columns.items()
+            },
+            "last_id": self.last_id,
+            "version": self.version,
+            "archived": self.archived
+        }
+
+    def __len__(self):
+        return len(self._index)
+
+    def column_of(self, task_id):
+        """Retorna a chave da coluna onde está a tarefa (ou None)."""
+        return self._index.get(task_id)
+
+    def get(self, task_id):
+        """Retorna a tarefa com o id informado (ou None)."""
+        column_key = self._index.get(task_id)
+        if column_key is None:
+            return None
+        return self.columns[column_key].tasks.get(task_id)
+
+    def _build_index(self, attribute, factory):
+        # Monta o índice com todas as tarefas (lê todas as colunas). Ele é
+        # publicado antes de preenchido: mutações feitas durante a montagem
+        # já o atualizam
+        with self._indexes_lock:
+            index = getattr(self, attribute)
+            if index is None:
+                index = factory()
+                setattr(self, attribute, index)
+                index.extend(task for column in list(self.columns.values()) for task in column)
+            return index
+
+    def search(self, text, limit=50):
+        """Tarefas com os termos de text no título, descrição ou responsável.
+
+        Ordenadas da mais relevante para a menos. A primeira busca monta o
+        índice e, portanto, lê todas as colunas.
+        """
+        index = self._search
+        if index is None:
+            index = self._build_index("_search", kanban_search.SearchIndex)
+        tasks = []
+        for task_id in index.search(text, limit):
+            task = self.get(task_id)
+            if task is not None:
+                tasks.append(task)
+        return tasks
+
+    def filter(self, assignees=(), priorities=(), due_from=None, due_to=None):
+        """Ids das tarefas que atendem aos filtros (kanban_filter.FilterIndex.match).
+
+        Retorna None quando nenhum filtro foi informado, sem montar o índice.
+        """
+        if not assignees and not priorities and due_from is None and due_to is None:
+            return None
+        index = self._filters
+        if index is None:
+            index = self._build_index("_filters", kanban_filter.FilterIndex)
+        return index.match(assignees, priorities, due_from, due_to)
+
+    def deadlines(self):
+        """Prazos das tarefas fora da coluna "done" (kanban_filter.DeadlineIndex)."""
+        index = self._deadlines
+        if index is None:
+            # Montado a partir dos pares (vencimento, id) de cada coluna: as
+            # colunas preguiçosas os têm no cabeçalho e não são lidas
+            with self._indexes_lock:
+                index = self._deadlines
+                if index is None:
+                    index = kanban_filter.DeadlineIndex(self.column_of)
+                    self._deadlines = index
+                    for key, column in list(self.columns.items()):
+                        index.extend_column(key, column.due_entries())
+        return index
+
+    def _reindex(self, task):
+        for index in (self._search, self._filters, self._deadlines):
+            if index is not None:
+                index.add(task)
+
+    def add(self, column_key, task):
+        task = self.columns[column_key].put(task)
+        self._index[task.id] = column_key
+        self.last_id = max(self.last_id, task.id)
+        self._reindex(task)
+
+    def move(self, task_id, from_column, to_column, fields=None):
+        if self._index.get(task_id) != from_column:
+            return False
+        task = self.columns[from_column].remove(task_id)
+        if fields:
+            task.update(fields)
+        task["column"] = to_column
+        self.columns[to_column].put(task)
+        self._index[task_id] = to_column
+        # O texto só muda com fields; o prazo depende também da coluna
+        if fields:
+            self._reindex(task)
+        elif self._deadlines is not None:
+            self._deadlines.add(task)
+        return True
+
+    def update(self, task_id, column_key, fields):
+        if self._index.get(task_id) != column_key:
+            return False
+        column = self.columns[column_key]
+        task = column.tasks[task_id]
+        task.update(fields)
+        column.refresh(task)
+        self._reindex(task)
+        return True
+
+    def delete(self, task_id, column_key):
+        if self._index.get(task_id) != column_key:
+            return False
+        self.columns[column_key].remove(task_id)
+        del self._index[task_id]
+        for index in (self._search, self._filters, self._deadlines):
+            if index is not None:
+                index.remove(task_id)
+        return True
+
+    def archive(self, column_key, task_ids):
+        """Tira do board as tarefas já gravadas no arquivo morto."""
+        archived = 0
+        for task_id in task_ids:
+            if self.delete(task_id, column_key):
+                archived += 1
+        self.archived += archived
+        return archived > 0
+
+    def apply(self, record):
+        """Aplica um registro de mutação (create/move/update/delete/archive).
+
+        Retorna False quando o registro não se aplica ao estado atual (por
+        exemplo, mover uma tarefa que já não está na coluna de origem).
+        """
+        if record.get("version", 0) <= self.version:
+            # Registro já incorporado ao snapshot (compactação interrompida)
+            return False
+
+        op = record["op"]
+        if op == "create":
+            self.add(record["column"], record["task"])
+            applied = True
+        elif op == "move":
+            applied = self.move(record["id"], record["from"], record["to"], record.get("fields"))
+        elif op == "update":
+            applied = self.update(record["id"], record["column"], record["fields"])
+        elif op == "delete":
+            applied = self.delete(record["id"], record["column"])
+        elif op == "archive":
+            applied = self.archive(record["column"], record["ids"])
+        else:
+            raise ValueError(f"Operação desconhecida: {op}")
+
+        if applied:
+            self.version = record["version"]
+        return applied
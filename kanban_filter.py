@@ -0,0 +1,244 @@
+import bisect
+import threading
+
+from kanban_search import normalize
+
+# Índices secundários para os filtros do board.
+#
+# Responsável -> ids e prioridade -> ids, além da lista (vencimento, id) em
+# ordem, em que um intervalo de datas é uma fatia achada com bisect. O Board
+# mantém os índices em dia a cada mutação, como o índice de busca, e um
+# filtro custa o tamanho do resultado: os critérios são cruzados a partir do
+# menor conjunto, sem percorrer as tarefas do board.
+#
+# O responsável é comparado sem acento e sem diferença de maiúsculas.
+
+_NO_DUE = None
+
+
+def assignee_key(name):
+    """Chave do responsável no índice ("" para tarefas sem responsável)."""
+    return normalize(name.strip()) if isinstance(name, str) else ""
+
+
+def due_ordinal(task):
+    """Vencimento da tarefa como ordinal do dia (None sem data ou com data ilegível)."""
+    try:
+        due = task.due
+    except ValueError:
+        return _NO_DUE
+    return due.toordinal() if due is not None else _NO_DUE
+
+
+class FilterIndex:
+    """Índices de responsável, prioridade e vencimento das tarefas."""
+
+    def __init__(self):
+        self._assignees = {}
+        self._priorities = {}
+        self._due = []
+        # Valores indexados de cada tarefa, para tirá-la dos índices
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, task):
+        """Indexa a tarefa (ou a reindexa, se já estava no índice)."""
+        with self._lock:
+            self._add(task, sorted_insert=True)
+
+    def extend(self, tasks):
+        """Indexa várias tarefas de uma vez (a lista de vencimentos é ordenada no fim)."""
+        with self._lock:
+            for task in tasks:
+                self._add(task, sorted_insert=False)
+            self._due.sort()
+
+    def _add(self, task, sorted_insert):
+        values = (assignee_key(task.get("assignee")), task.priority_label, due_ordinal(task))
+        if self._docs.get(task.id) == values:
+            return
+        self._remove(task.id)
+        assignee, priority, due = values
+        self._assignees.setdefault(assignee, set()).add(task.id)
+        self._priorities.setdefault(priority, set()).add(task.id)
+        if due is not _NO_DUE:
+            if sorted_insert:
+                bisect.insort(self._due, (due, task.id))
+            else:
+                self._due.append((due, task.id))
+        self._docs[task.id] = values
+
+    def remove(self, task_id):
+        """Tira a tarefa dos índices."""
+        with self._lock:
+            self._remove(task_id)
+
+    def _remove(self, task_id):
+        values = self._docs.pop(task_id, None)
+        if values is None:
+            return
+        assignee, priority, due = values
+        self._discard(self._assignees, assignee, task_id)
+        self._discard(self._priorities, priority, task_id)
+        if due is not _NO_DUE:
+            entry = (due, task_id)
+            position = bisect.bisect_left(self._due, entry)
+            if position < len(self._due) and self._due[position] == entry:
+                del self._due[position]
+            else:
+                # Durante extend() a lista ainda não está em ordem
+                self._due.remove(entry)
+
+    @staticmethod
+    def _discard(index, key, task_id):
+        ids = index[key]
+        ids.discard(task_id)
+        if not ids:
+            del index[key]
+
+    def match(self, assignees=(), priorities=(), due_from=None, due_to=None):
+        """Ids das tarefas que atendem a todos os critérios informados.
+
+        assignees e priorities aceitam vários valores (basta um deles);
+        due_from e due_to são datas, inclusive, e qualquer um pode ficar em
+        aberto. Retorna None quando nenhum critério foi informado.
+        """
+        with self._lock:
+            sets = []
+            if assignees:
+                sets.append(self._union(self._assignees, [assignee_key(name) for name in assignees]))
+            if priorities:
+                sets.append(self._union(self._priorities, priorities))
+            if due_from is not None or due_to is not None:
+                start = 0 if due_from is None else bisect.bisect_left(self._due, (due_from.toordinal(),))
+                stop = len(self._due) if due_to is None else bisect.bisect_left(self._due, (due_to.toordinal() + 1,))
+                sets.append({task_id for _, task_id in self._due[start:stop]})
+        if not sets:
+            return None
+
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            result &= ids
+        return result
+
+    @staticmethod
+    def _union(index, keys):
+        ids = set()
+        for key in keys:
+            ids |= index.get(key, set())
+        return ids
+
+
+class DeadlineIndex:
+    """Vencimentos das tarefas em aberto, para prazos atrasados e próximos.
+
+    Lista (vencimento, id) em ordem, só com as tarefas fora das colunas
+    encerradas (closed_columns): contagens e consultas por data são buscas
+    com bisect, O(log n), mais o tamanho do que é devolvido. column_of dá a
+    coluna atual de uma tarefa (Board.column_of).
+    """
+
+    def __init__(self, column_of, closed_columns=("done",)):
+        self._column_of = column_of
+        self._closed = frozenset(closed_columns)
+        self._due = []
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, task):
+        """Atualiza o vencimento da tarefa (sai do índice se foi concluída)."""
+        with self._lock:
+            self._add(task, sorted_insert=True)
+
+    def extend(self, tasks):
+        """Indexa várias tarefas de uma vez (a lista é ordenada no fim)."""
+        with self._lock:
+            for task in tasks:
+                self._add(task, sorted_insert=False)
+            self._due.sort()
+
+    def extend_column(self, column_key, entries):
+        """Indexa os pares (vencimento, id) de uma coluna, sem ler as tarefas.
+
+        Tarefas já indexadas (alteradas durante a montagem) são mantidas.
+        """
+        if column_key in self._closed:
+            return
+        with self._lock:
+            for due, task_id in entries:
+                if task_id in self._docs:
+                    continue
+                self._due.append((due, task_id))
+                self._docs[task_id] = due
+            self._due.sort()
+
+    def _add(self, task, sorted_insert):
+        due = _NO_DUE
+        if self._column_of(task.id) not in self._closed:
+            due = due_ordinal(task)
+        if self._docs.get(task.id, _NO_DUE) == due:
+            return
+        self._remove(task.id)
+        if due is not _NO_DUE:
+            if sorted_insert:
+                bisect.insort(self._due, (due, task.id))
+            else:
+                self._due.append((due, task.id))
+            self._docs[task.id] = due
+
+    def remove(self, task_id):
+        """Tira a tarefa do índice."""
+        with self._lock:
+            self._remove(task_id)
+
+    def _remove(self, task_id):
+        due = self._docs.pop(task_id, _NO_DUE)
+        if due is _NO_DUE:
+            return
+        entry = (due, task_id)
+        position = bisect.bisect_left(self._due, entry)
+        if position < len(self._due) and self._due[position] == entry:
+            del self._due[position]
+        else:
+            # Durante extend() a lista ainda não está em ordem
+            self._due.remove(entry)
+
+    def _range(self, start, stop, limit):
+        # Quantas tarefas vencem entre os ordinais start e stop (exclusive) e
+        # as limit primeiras, como (vencimento, id)
+        with self._lock:
+            low = 0 if start is None else bisect.bisect_left(self._due, (start,))
+            high = bisect.bisect_left(self._due, (stop,))
+            return high - low, self._due[low:min(high, low + limit)]
+
+    def overdue(self, today, limit=10):
+        """(quantidade, primeiras limit) das tarefas vencidas antes de today."""
+        return self._range(None, today.toordinal(), limit)
+
+    def due_within(self, today, days, limit=10):
+        """(quantidade, primeiras limit) das que vencem de today até today + days."""
+        return self._range(today.toordinal(), today.toordinal() + days + 1, limit)
+
+    def next_deadline(self, today):
+        """Próximo vencimento a partir de today, como (vencimento, id), ou None."""
+        with self._lock:
+            position = bisect.bisect_left(self._due, (today.toordinal(),))
+            return self._due[position] if position < len(self._due) else None
+
+    def status(self, task_id, today, days):
+        """"overdue", "soon" (vence em até days dias) ou None, em O(1)."""
+        due = self._docs.get(task_id, _NO_DUE)
+        if due is _NO_DUE:
+            return None
+        if due < today.toordinal():
+            return "overdue"
+        if due <= today.toordinal() + days:
+            return "soon"
+        return None
@@ -0,0 +1,180 @@
+import bisect
+import functools
+import json
+import os
+import threading
+
+import kanban_store
+from kanban_board import Board
+
+# Histórico do board (event sourcing).
+#
+# Toda mutação gravada pelo store (criar, mover, editar, excluir, arquivar)
+# também é anexada, com o horário em que aconteceu ("at"), ao events.jsonl do
+# diretório "<arquivo do board>.history/". Ao contrário do journal, esse
+# arquivo nunca é compactado.
+#
+# A cada SNAPSHOT_EVERY eventos o histórico grava um snapshot do board
+# (snapshots/<versão>.json.gz) e o registra em snapshots.json, com o horário
+# e a posição no events.jsonl. Reconstruir o board num instante qualquer é
+# ler o último snapshot anterior a ele e reaplicar no máximo SNAPSHOT_EVERY
+# eventos. Um save() do board inteiro também gera um snapshot.
+#
+# Supõe um único processo gravando (um servidor Streamlit), como a gravação
+# agrupada do store.
+HISTORY_SUFFIX = ".history"
+EVENTS_FILE = "events.jsonl"
+SNAPSHOTS_DIR = "snapshots"
+SNAPSHOTS_INDEX = "snapshots.json"
+SNAPSHOT_FORMAT = "gzip"
+SNAPSHOT_EVERY = 1000
+# Snapshots decodificados mantidos em memória para consultas repetidas
+SNAPSHOT_CACHE = 4
+
+
+@functools.lru_cache(maxsize=SNAPSHOT_CACHE)
+def _read_snapshot_file(path):
+    # Snapshots nunca são reescritos, então o conteúdo lido pode ser reusado;
+    # Board.from_dict cria tarefas novas e não altera o dict
+    return kanban_store.read_snapshot(path)
+
+
+class TaskHistory:
+    """Eventos com horário e snapshots periódicos de um board."""
+
+    def __init__(self, board_path):
+        self.path = board_path + HISTORY_SUFFIX
+        self.events_path = os.path.join(self.path, EVENTS_FILE)
+        self.index_path = os.path.join(self.path, SNAPSHOTS_INDEX)
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(self.path, SNAPSHOTS_DIR), exist_ok=True)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._snapshots = json.load(f)
+        except FileNotFoundError:
+            self._snapshots = []
+        # Horário do último evento ou snapshot registrado
+        self._last_at = self._snapshots[-1]["at"] if self._snapshots else None
+        self._since_snapshot = 0
+        for event in self._read_events(self._last_offset()):
+            self._since_snapshot += 1
+            self._last_at = event.get("at") or self._last_at
+
+    def _last_offset(self):
+        return self._snapshots[-1]["offset"] if self._snapshots else 0
+
+    def _events_size(self):
+        try:
+            return os.path.getsize(self.events_path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_events(self, start, end=None):
+        # Lê os eventos entre as posições start e end do events.jsonl; uma
+        # linha incompleta no fim (gravação em andamento) é ignorada
+        try:
+            f = open(self.events_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(start)
+            for line in f:
+                if (end is not None and f.tell() > end) or not line.endswith(b'\n'):
+                    break
+                yield json.loads(line)
+
+    def _write_snapshot(self, board, at):
+        name = f"{SNAPSHOTS_DIR}/{board.version:010d}.json.gz"
+        kanban_store.write_snapshot(os.path.join(self.path, name), board.to_dict(), SNAPSHOT_FORMAT)
+        self._snapshots.append({
+            "version": board.version,
+            "at": at,
+            "offset": self._events_size(),
+            "file": name
+        })
+        kanban_store.write_snapshot(self.index_path, self._snapshots)
+        self._since_snapshot = 0
+        self._last_at = max(self._last_at or at, at)
+
+    def _load_snapshot(self, snapshot):
+        return Board.from_dict(_read_snapshot_file(os.path.join(self.path, snapshot["file"])))
+
+    def start(self, board):
+        """Grava o snapshot inicial, se o histórico ainda não tem nenhum."""
+        with self._lock:
+            if not self._snapshots:
+                self._write_snapshot(board, kanban_store.event_time())
+
+    def reset(self, board):
+        """Registra um board gravado por inteiro (save()) como novo ponto de partida."""
+        with self._lock:
+            self._write_snapshot(board, kanban_store.event_time())
+
+    def append(self, records):
+        """Anexa eventos já gravados pelo store (com "version" e "at")."""
+        with self._lock:
+            with open(self.events_path, 'ab') as f:
+                f.write(b''.join(kanban_store.encode_record(record) for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self._since_snapshot += len(records)
+            self._last_at = records[-1].get("at") or self._last_at
+            if self._since_snapshot >= SNAPSHOT_EVERY:
+                board = self._load_snapshot(self._snapshots[-1])
+                for event in self._read_events(self._last_offset()):
+                    board.apply(event)
+                self._write_snapshot(board, records[-1].get("at") or kanban_store.event_time())
+
+    def is_current(self, when):
+        """Indica se nada foi registrado depois de when: o board atual vale para when."""
+        at = kanban_store.event_time(when)
+        with self._lock:
+            return self._last_at is not None and at >= self._last_at
+
+    def board_as_of(self, when):
+        """Reconstrói o board como estava no instante when (datetime).
+
+        Retorna None se when é anterior ao início do histórico.
+        """
+        at = kanban_store.event_time(when)
+        with self._lock:
+            snapshots = list(self._snapshots)
+        position = bisect.bisect_right([snapshot["at"] for snapshot in snapshots], at)
+        if position == 0:
+            return None
+
+        board = self._load_snapshot(snapshots[position - 1])
+        # Só os eventos até o próximo snapshot: a reaplicação é limitada
+        end = snapshots[position]["offset"] if position < len(snapshots) else None
+        for event in self._read_events(snapshots[position - 1]["offset"], end):
+            if event.get("at", "") > at:
+                break
+            board.apply(event)
+        return board
+
+    def task_events(self, task_id):
+        """Todos os eventos de uma tarefa, em ordem (para análises de fluxo)."""
+        events = []
+        for event in self._read_events(0):
+            if event.get("id") == task_id or event.get("task", {}).get("id") == task_id:
+                events.append(event)
+            elif task_id in event.get("ids", ()):
+                events.append(event)
+        return events
+
+
+# Um histórico por board, compartilhado pelas sessões do processo
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def open_history(store):
+    """Liga o histórico ao store (um por arquivo no processo) e o retorna."""
+    key = os.path.abspath(store.path)
+    with _histories_lock:
+        history = _histories.get(key)
+        if history is None:
+            history = TaskHistory(store.path)
+            store.set_history(history)
+            _histories[key] = history
+        return history
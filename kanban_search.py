@@ -0,0 +1,140 @@
+import bisect
+import functools
+import heapq
+import math
+import re
+import threading
+import unicodedata
+
+# Índice invertido para a busca de tarefas no board.
+#
+# Título, descrição e responsável são quebrados em palavras sem acento e em
+# minúsculas ("Revisão" e "revisao" são o mesmo termo). Para cada termo o
+# índice guarda as tarefas que o contêm e o peso do termo em cada uma (uma
+# palavra no título vale mais que na descrição). O Board mantém o índice em
+# dia a cada criação, edição e exclusão, reindexando só a tarefa alterada.
+#
+# A busca exige todos os termos da consulta; o último também vale como
+# prefixo (busca enquanto se digita). O resultado é ordenado pela soma dos
+# pesos ponderados pela raridade de cada termo (idf) e percorre só as
+# tarefas do termo mais raro, sem varrer o board.
+
+# Peso de cada ocorrência de um termo, por campo
+FIELD_WEIGHTS = (("title", 3), ("assignee", 2), ("description", 1))
+# Tamanho mínimo para o último termo da consulta valer como prefixo
+MIN_PREFIX = 2
+# Palavras com a forma sem acento já calculada (o vocabulário se repete muito)
+FOLD_CACHE_SIZE = 65536
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Texto em minúsculas e sem acentos."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+@functools.lru_cache(maxsize=FOLD_CACHE_SIZE)
+def _fold(word):
+    return word if word.isascii() else normalize(word)
+
+
+def tokenize(text):
+    """Palavras do texto, normalizadas (lista vazia para None ou texto vazio)."""
+    if not text or not isinstance(text, str):
+        return []
+    return [_fold(word) for word in _WORD.findall(text.casefold())]
+
+
+class SearchIndex:
+    """Índice invertido termo -> {id da tarefa: peso}."""
+
+    def __init__(self):
+        self._postings = {}
+        # Termos de cada tarefa, para tirá-la do índice sem varrê-lo
+        self._docs = {}
+        # Vocabulário em ordem, para achar os termos de um prefixo com bisect
+        self._terms = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, task):
+        """Indexa a tarefa (ou a reindexa, se já estava no índice)."""
+        terms = {}
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(task.get(field)):
+                terms[term] = terms.get(term, 0) + weight
+        with self._lock:
+            self._remove(task.id)
+            for term, weight in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._terms, term)
+                postings[task.id] = weight
+            self._docs[task.id] = terms
+
+    def extend(self, tasks):
+        """Indexa várias tarefas."""
+        for task in tasks:
+            self.add(task)
+
+    def remove(self, task_id):
+        """Tira a tarefa do índice."""
+        with self._lock:
+            self._remove(task_id)
+
+    def _remove(self, task_id):
+        for term in self._docs.pop(task_id, ()):
+            postings = self._postings[term]
+            del postings[task_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _matches(self, term, prefix):
+        # Tarefas com o termo; como prefixo, a união dos termos que começam
+        # com ele (maior peso de cada tarefa)
+        if not prefix or len(term) < MIN_PREFIX:
+            return self._postings.get(term, {})
+        matches = {}
+        start = bisect.bisect_left(self._terms, term)
+        for position in range(start, len(self._terms)):
+            candidate = self._terms[position]
+            if not candidate.startswith(term):
+                break
+            for task_id, weight in self._postings[candidate].items():
+                if weight > matches.get(task_id, 0):
+                    matches[task_id] = weight
+        return matches
+
+    def search(self, text, limit=50):
+        """Ids das tarefas com todos os termos de text, das mais relevantes às menos."""
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms:
+            return []
+        with self._lock:
+            total = len(self._docs)
+            lists = [
+                self._matches(term, prefix=(position == len(terms) - 1))
+                for position, term in enumerate(terms)
+            ]
+            if not all(lists):
+                return []
+            lists.sort(key=len)
+            idfs = [math.log(1 + total / len(matches)) for matches in lists]
+
+            scored = []
+            for task_id in lists[0]:
+                score = 0.0
+                for matches, idf in zip(lists, idfs):
+                    weight = matches.get(task_id)
+                    if weight is None:
+                        break
+                    score += weight * idf
+                else:
+                    scored.append((score, task_id))
+        return [task_id for _, task_id in heapq.nlargest(limit, scored)]
@@ -0,0 +1,1244 @@
+import atexit
+import contextlib
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from kanban_board import Board, Column, LazyColumn, Task
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem lock entre processos, só entre as sessões do mesmo processo
+    fcntl = None
+
+# Formatos opcionais do snapshot: só ficam disponíveis com a biblioteca instalada
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Persistência do board Kanban.
+#
+# Todos os apps passam por um BoardStore, obtido com open_store(). Há dois
+# backends:
+#
+# - JsonBoardStore: o arquivo .json é um snapshot e cada mutação (criar,
+#   mover, editar, excluir, arquivar) é anexada como uma linha JSON compacta
+#   ao journal "<arquivo>.journal". O snapshot só é reescrito na compactação,
+#   quando o journal acumula COMPACT_EVERY registros, ou num save() explícito.
+# - SqliteBoardStore: banco SQLite em modo WAL, com uma linha por tarefa e
+#   índices por id, coluna, responsável e data de vencimento; cada mutação
+#   é um UPDATE/INSERT/DELETE de uma única linha.
+#
+# Os dois mantêm o board já interpretado em memória (kanban_board.Board),
+# compartilhado por todas as sessões do processo, e só releem o que mudou
+# desde a última leitura.
+#
+# Concorrência: o board tem um número de versão incrementado a cada gravação.
+# Leituras não travam nada; gravações acontecem sob um lock curto (fcntl no
+# arquivo "<arquivo>.lock" para o JSON, BEGIN IMMEDIATE no SQLite), dentro do
+# qual o store relê o que outras sessões gravaram, confere a versão esperada
+# (compare-and-swap), aloca o id de tarefas novas e grava a mutação.
+#
+# Gravação agrupada (group commit): com commit_delay > 0, cada mutação é
+# aplicada na hora ao board em memória e fica pendente; as pendentes são
+# gravadas juntas, com um único fsync/commit, quando a mais antiga completa
+# commit_delay segundos (o atraso máximo), quando acumulam max_batch, num
+# flush() explícito ou no encerramento do processo. Nesse modo o board em
+# memória é a fonte da verdade até o flush, o que supõe um único processo
+# gravando (um servidor Streamlit); se outro processo tiver gravado nesse
+# meio-tempo, as pendentes são renumeradas para depois das dele e o board é
+# relido do disco.
+#
+# Gravação em segundo plano: com background=True, as mutações pendentes vão
+# para uma thread gravadora dedicada (que também agrupa o que chegar dentro
+# de commit_delay), e a thread do Streamlit nunca espera pelo disco. A fila é
+# limitada a max_pending mutações: cheia, quem grava espera o gravador
+# esvaziá-la. Uma falha de gravação fica em write_error para a interface
+# mostrar, e as mutações continuam na fila para a próxima tentativa.
+#
+# Histórico: com um kanban_history.TaskHistory ligado (set_history), cada lote
+# gravado também é anexado ao histórico de eventos, e cada save() vira um
+# snapshot dele.
+#
+# Locks: _lock protege o board em memória e a fila; _io_lock serializa as
+# gravações em disco. Quando os dois são necessários, _io_lock vem primeiro,
+# e ninguém espera pela fila segurando _lock. No SQLite, load() lê por uma
+# conexão própria, sob _read_lock, sempre o último lock tomado.
+#
+# Formato do snapshot JSON (snapshot_format): "json" (compacto, sem
+# indentação), "gzip" ou "zstd" (JSON compacto comprimido) e "msgpack"
+# (binário). Na leitura o formato é detectado pelo cabeçalho do arquivo, então
+# trocar de formato não exige conversão: o próximo snapshot já sai no novo.
+# JSON indentado só existe como exportação (export_json).
+#
+# Com lazy_columns=True o snapshot é segmentado: um cabeçalho com nome, ids e
+# posição de cada coluna no arquivo, seguido de um segmento por coluna (no
+# formato de snapshot_format). A leitura só decodifica o cabeçalho; cada
+# coluna é lida do disco no primeiro acesso às suas tarefas, e a compactação
+# copia sem decodificar os segmentos das colunas que ninguém leu nem alterou.
+# O arquivo lido fica aberto enquanto houver colunas a ler dele; antes de
+# substituí-lo (o Windows não troca um arquivo aberto), o store passa o
+# conteúdo ainda não lido para a memória, sem decodificá-lo, fecha o arquivo
+# e, depois, liga as colunas não lidas aos segmentos do snapshot novo.
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+COMMIT_BATCH = 100
+MAX_PENDING = 1000
+RETRY_DELAY = 1.0
+CLOSE_TIMEOUT = 10.0
+COMPACT_EVERY = 500
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+SNAPSHOT_FORMATS = ("json", "gzip", "zstd", "msgpack")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Cabeçalhos usados na detecção do formato do snapshot
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+MSGPACK_MAGIC = b"KBMP\x01"
+SEGMENTED_MAGIC = b"KBSG\x01\n"
+
+# Campos da tarefa com coluna própria na tabela do SQLite; o resto vai em "extra"
+TASK_FIELDS = ("title", "description", "priority", "assignee", "due_date", "created_at")
+# Chave de "extra" com os campos (de TASK_FIELDS e "column") ausentes na tarefa
+# original: um NULL nessas colunas volta como campo ausente, não como None
+ABSENT_KEY = "__absent__"
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def event_time(when=None):
+    """Horário de uma mutação: ISO com milissegundos, comparável como texto."""
+    return (when or datetime.now()).isoformat(timespec="milliseconds")
+
+
+def encode_record(record):
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def encode_snapshot(data, snapshot_format="json"):
+    """Serializa o board (dict) no formato de snapshot escolhido."""
+    if snapshot_format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("Formato msgpack requer o pacote msgpack")
+        return MSGPACK_MAGIC + msgpack.packb(data, use_bin_type=True)
+
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if snapshot_format == "json":
+        return payload
+    if snapshot_format == "gzip":
+        # mtime=0: o mesmo board gera sempre os mesmos bytes
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+    if snapshot_format == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Formato zstd requer o pacote zstandard")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    raise ValueError(f"Formato de snapshot desconhecido: {snapshot_format}")
+
+
+def detect_format(raw):
+    """Identifica o formato de um snapshot pelo cabeçalho."""
+    if raw.startswith(SEGMENTED_MAGIC):
+        return "segmented"
+    if raw.startswith(GZIP_MAGIC):
+        return "gzip"
+    if raw.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if raw.startswith(MSGPACK_MAGIC):
+        return "msgpack"
+    return "json"
+
+
+def decode_snapshot(raw):
+    """Lê um snapshot em qualquer dos formatos (detectado pelo cabeçalho)."""
+    snapshot_format = detect_format(raw)
+    if snapshot_format == "segmented":
+        header_end = raw.index(b"\n", len(SEGMENTED_MAGIC)) + 1
+        header = json.loads(raw[len(SEGMENTED_MAGIC):header_end])
+        columns = {}
+        for column in header["columns"]:
+            start = header_end + column["offset"]
+            tasks = decode_snapshot(raw[start:start + column["length"]])
+            columns[column["key"]] = {"name": column["name"], "tasks": tasks}
+        return {
+            "columns": columns,
+            "last_id": header["last_id"],
+            "version": header["version"],
+            "archived": header.get("archived", 0)
+        }
+    if snapshot_format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("Snapshot em msgpack: instale o pacote msgpack")
+        # strict_map_key=False: as chaves das colunas podem ser números em boards antigos
+        return msgpack.unpackb(raw[len(MSGPACK_MAGIC):], raw=False, strict_map_key=False)
+    if snapshot_format == "gzip":
+        raw = gzip.decompress(raw)
+    elif snapshot_format == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Snapshot em zstd: instale o pacote zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def encode_segmented(board, snapshot_format="json"):
+    """Serializa o board (Board) em segmentos por coluna, após um cabeçalho."""
+    columns = []
+    segments = []
+    offset = 0
+    for column in board.columns.values():
+        if (isinstance(column, LazyColumn) and column.pristine
+                and column.segment.snapshot_format == snapshot_format):
+            segment = column.segment.raw()
+        else:
+            segment = encode_snapshot([task.to_dict() for task in column], snapshot_format)
+        columns.append({
+            "key": column.key,
+            "name": column.name,
+            "ids": column.task_ids(),
+            "due": column.due_entries(),
+            "offset": offset,
+            "length": len(segment)
+        })
+        segments.append(segment)
+        offset += len(segment)
+
+    header = {
+        "version": board.version,
+        "last_id": board.last_id,
+        "archived": board.archived,
+        "format": snapshot_format,
+        "columns": columns
+    }
+    header = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return SEGMENTED_MAGIC + header + b"\n" + b"".join(segments)
+
+
+class _SnapshotFile:
+    """Snapshot segmentado aberto, de onde as colunas são lidas sob demanda.
+
+    O arquivo fica aberto enquanto alguma coluna depender dele, ou até
+    detach(), que copia os segmentos para a memória e o fecha.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._data = None
+        self._lock = threading.Lock()
+        if self._file.read(len(SEGMENTED_MAGIC)) != SEGMENTED_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} não é um snapshot segmentado")
+        self.header = json.loads(self._file.readline())
+        self.base = self._file.tell()
+
+    def read(self, offset, length):
+        with self._lock:
+            if self._data is not None:
+                return self._data[offset:offset + length]
+            self._file.seek(self.base + offset)
+            return self._file.read(length)
+
+    def detach(self):
+        """Lê os segmentos (ainda codificados) para a memória e fecha o arquivo."""
+        with self._lock:
+            if self._data is None:
+                self._file.seek(self.base)
+                self._data = self._file.read()
+                self._file.close()
+
+    def __del__(self):
+        self._file.close()
+
+
+class _Segment:
+    """Segmento com as tarefas de uma coluna no snapshot segmentado."""
+
+    def __init__(self, source, offset, length, snapshot_format):
+        self.source = source
+        self.offset = offset
+        self.length = length
+        self.snapshot_format = snapshot_format
+
+    def raw(self):
+        return self.source.read(self.offset, self.length)
+
+    def __call__(self):
+        return decode_snapshot(self.raw())
+
+
+def load_board(path):
+    """Lê o board do snapshot (Board), com colunas preguiçosas se for segmentado."""
+    with open(path, 'rb') as f:
+        segmented = f.read(len(SEGMENTED_MAGIC)) == SEGMENTED_MAGIC
+    if not segmented:
+        return Board.from_dict(read_snapshot(path))
+
+    source = _SnapshotFile(path)
+    header = source.header
+    columns = [
+        LazyColumn(
+            column["key"],
+            column["name"],
+            column["ids"],
+            _Segment(source, column["offset"], column["length"], header["format"]),
+            column.get("due")
+        )
+        for column in header["columns"]
+    ]
+    return Board(columns, header["last_id"], header["version"], header.get("archived", 0))
+
+
+def read_snapshot(path):
+    """Lê o arquivo de snapshot, detectando o formato."""
+    with open(path, 'rb') as f:
+        return decode_snapshot(f.read())
+
+
+def write_snapshot(path, data, snapshot_format="json"):
+    """Grava o snapshot de forma atômica (arquivo temporário + troca)."""
+    _write_atomic(path, encode_snapshot(data, snapshot_format))
+
+
+def _write_atomic(path, payload):
+    # Escreve num arquivo temporário e troca atomicamente: uma queda no meio
+    # da escrita nunca deixa o snapshot truncado.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ConflictError(Exception):
+    """O board foi alterado por outra sessão depois da versão esperada."""
+
+
+def _check_version(current, expected):
+    if expected is not None and current != expected:
+        raise ConflictError(f"Board na versão {current}, esperada {expected}")
+
+
+def _prepare_record(record, version, last_id):
+    # Numera o registro com a próxima versão, marca o horário e, na criação,
+    # aloca o próximo id
+    record = dict(record, version=version + 1, at=event_time())
+    if record["op"] == "create":
+        record["task"] = dict(record["task"], id=last_id + 1)
+    return record
+
+
+def _rebase_records(records, version, last_id):
+    # Renumera mutações pendentes para depois das gravadas por outro processo,
+    # realocando os ids das tarefas criadas (e as referências a eles)
+    new_ids = {}
+    rebased = []
+    for record in records:
+        version += 1
+        record = dict(record, version=version)
+        if record["op"] == "create":
+            last_id += 1
+            new_ids[record["task"]["id"]] = last_id
+            record["task"] = dict(record["task"], id=last_id)
+        elif record["op"] == "archive":
+            record["ids"] = [new_ids.get(task_id, task_id) for task_id in record["ids"]]
+        elif record["id"] in new_ids:
+            record["id"] = new_ids[record["id"]]
+        rebased.append(record)
+    return rebased
+
+
+class BoardStore:
+    """Interface comum dos backends de armazenamento do board."""
+
+    def __init__(self, path, commit_delay=0.0, max_batch=COMMIT_BATCH,
+                 background=False, max_pending=MAX_PENDING):
+        self.path = path
+        self.commit_delay = commit_delay
+        self.max_batch = max_batch
+        self.background = background
+        self.max_pending = max_pending
+        self.write_error = None
+        self.history = None
+        self.history_error = None
+        self._lock = threading.RLock()
+        self._io_lock = threading.RLock()
+        self._queue_changed = threading.Condition(self._lock)
+        self._board = None
+        self._pending = []
+        self._writing = False
+        self._flush_requested = False
+        self._closing = False
+        self._flush_timer = None
+        self._writer = None
+        if background:
+            self._writer = threading.Thread(
+                target=self._write_loop, name=f"kanban-writer:{path}", daemon=True
+            )
+            self._writer.start()
+        if commit_delay or background:
+            atexit.register(self.close)
+
+    def exists(self):
+        """Indica se já existe um board salvo."""
+        raise NotImplementedError
+
+    def load(self):
+        """Retorna o board atual (kanban_board.Board).
+
+        O board retornado é compartilhado entre chamadas e sessões: quem
+        alterá-lo deve persistir a alteração com apply() ou save().
+        """
+        raise NotImplementedError
+
+    def save(self, board, expected_version=None):
+        """Substitui o board inteiro (Board ou dict no layout JSON).
+
+        Com expected_version, só grava se o board salvo ainda estiver nessa
+        versão; caso contrário levanta ConflictError.
+        """
+        raise NotImplementedError
+
+    def apply(self, record, expected_version=None):
+        """Persiste uma única mutação (create/move/update/delete).
+
+        Na criação, o id da tarefa é alocado pelo store dentro da seção
+        protegida, então sessões concorrentes nunca recebem o mesmo id. Com
+        expected_version, só grava se o board ainda estiver nessa versão;
+        caso contrário levanta ConflictError.
+
+        Retorna o registro gravado (com a versão e o id alocado), ou None,
+        sem gravar nada, se a mutação não se aplica ao estado atual.
+        """
+        if self.commit_delay or self.background:
+            return self._apply_deferred(record, expected_version)
+        return self._apply_now(record, expected_version)
+
+    def _apply_now(self, record, expected_version):
+        raise NotImplementedError
+
+    def _write_batch(self, records):
+        """Grava de uma vez registros já aplicados ao board em memória."""
+        raise NotImplementedError
+
+    def set_history(self, history):
+        """Passa a registrar as mutações gravadas também no histórico (kanban_history)."""
+        with self._io_lock, self._lock:
+            if self.exists():
+                history.start(self.load())
+            self.history = history
+
+    def _record_history(self, records=(), board=None):
+        # Registra no histórico as mutações gravadas ou, num save(), o board
+        # inteiro. O histórico é secundário: uma falha nele não desfaz nem
+        # repete a gravação do board, só fica registrada em history_error
+        if self.history is None or not (records or board):
+            return
+        try:
+            if board is not None:
+                self.history.reset(board)
+            else:
+                self.history.append(records)
+            self.history_error = None
+        except OSError as exc:
+            self.history_error = exc
+
+    def _memory_ahead(self):
+        # O board em memória tem mutações que ainda não chegaram ao disco
+        return bool(self._pending) or self._writing
+
+    def _apply_deferred(self, record, expected_version):
+        flush_now = False
+        with self._lock:
+            board = self.load()
+            _check_version(board.version, expected_version)
+            record = _prepare_record(record, board.version, board.last_id)
+            if not board.apply(record):
+                return None
+
+            self._pending.append(record)
+            if self.background:
+                self._queue_changed.notify_all()
+                # Contrapressão: com a fila cheia, espera o gravador esvaziá-la
+                # (a espera libera _lock). Se o disco está falhando, não trava
+                # a interface: o erro já aparece em write_error.
+                while (len(self._pending) >= self.max_pending
+                       and self.write_error is None and not self._closing):
+                    self._queue_changed.wait()
+            elif len(self._pending) >= self.max_batch:
+                flush_now = True
+            elif self._flush_timer is None:
+                self._schedule_flush(self.commit_delay)
+
+        if flush_now:
+            self.flush()
+        return record
+
+    def _schedule_flush(self, delay):
+        # Chamado com _lock tomado
+        self._flush_timer = threading.Timer(delay, self._timed_flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _timed_flush(self):
+        # Gravação agrupada disparada pelo timer. Uma exceção aqui só iria
+        # para o stderr: como no gravador em segundo plano, o erro fica em
+        # write_error e a gravação é tentada de novo depois de RETRY_DELAY
+        try:
+            self.flush()
+        except Exception:
+            with self._lock:
+                if self._pending and self._flush_timer is None and not self._closing:
+                    self._schedule_flush(RETRY_DELAY)
+
+    def flush(self):
+        """Grava agora as mutações pendentes e espera a gravação terminar."""
+        if self._writer is not None:
+            with self._lock:
+                while self._memory_ahead() and self.write_error is None and self._writer.is_alive():
+                    self._flush_requested = True
+                    self._queue_changed.notify_all()
+                    self._queue_changed.wait()
+            return
+
+        with self._io_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._pending:
+                    return
+                records, self._pending = self._pending, []
+                self._writing = True
+            try:
+                self._write_batch(records)
+            except BaseException as exc:
+                with self._lock:
+                    self._pending[:0] = records
+                    self.write_error = exc
+                raise
+            finally:
+                self._writing = False
+            self.write_error = None
+
+    def _write_loop(self):
+        # Thread gravadora: pega as mutações pendentes em lotes e grava cada
+        # lote com um único fsync/commit
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._queue_changed.wait()
+                if not self._pending:
+                    return
+
+                # Janela de agrupamento: espera por mais mutações até completar
+                # commit_delay, juntar max_batch ou alguém pedir flush()
+                deadline = time.monotonic() + self.commit_delay
+                while (len(self._pending) < self.max_batch
+                       and not self._closing and not self._flush_requested):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue_changed.wait(remaining)
+
+                self._flush_requested = False
+                records = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._writing = True
+                self._queue_changed.notify_all()
+
+            error = None
+            try:
+                with self._io_lock:
+                    self._write_batch(records)
+            except Exception as exc:
+                error = exc
+
+            with self._lock:
+                self._writing = False
+                if error is not None:
+                    # Devolve o lote à frente da fila para a próxima tentativa
+                    self._pending[:0] = records
+                self.write_error = error
+                self._queue_changed.notify_all()
+
+            if error is not None:
+                if self._closing:
+                    return
+                time.sleep(RETRY_DELAY)
+
+    def close(self):
+        """Grava as mutações pendentes e encerra o gravador em segundo plano."""
+        if self._writer is None:
+            self.flush()
+            return
+        with self._lock:
+            self._closing = True
+            self._queue_changed.notify_all()
+        self._writer.join(CLOSE_TIMEOUT)
+
+    def _undo_rebase(self, board, pending):
+        # O rebase falhou: volta ao board em memória e às pendentes de antes.
+        # Quem chamou devolve o lote à frente da fila e tenta de novo depois
+        self._board = board
+        self._pending = pending + self._pending
+        self._writing = True
+
+    def _discard_pending(self):
+        # Um save() do board inteiro já inclui (ou substitui) as pendentes
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        self._pending = []
+        self._queue_changed.notify_all()
+
+    def export_json(self):
+        """Retorna o board atual como JSON formatado, para download."""
+        return json.dumps(self.load().to_dict(), ensure_ascii=False, indent=2)
+
+
+class JsonBoardStore(BoardStore):
+    """Snapshot (JSON compacto, comprimido ou msgpack) + journal de mutações."""
+
+    def __init__(self, path, snapshot_format="json", lazy_columns=False, **options):
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Formato de snapshot desconhecido: {snapshot_format}")
+        self.snapshot_format = snapshot_format
+        self.lazy_columns = lazy_columns
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.lock_path = path + LOCK_SUFFIX
+        self._lock_depth = 0
+        self._snapshot_signature = None
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        super().__init__(path, **options)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """Seção de escrita: exclusiva entre threads e, via fcntl, entre processos."""
+        with self._io_lock:
+            if fcntl is None or self._lock_depth:
+                # Reentrante: compact() é chamado de dentro de apply()
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_snapshot(self):
+        signature = _file_signature(self.path)
+        if self._board is None or self._snapshot_signature != signature:
+            self._board = load_board(self.path)
+            self._snapshot_signature = signature
+            self._journal_inode = None
+
+    def _replay_journal(self, repair=False):
+        """Aplica ao board em memória os registros do journal ainda não lidos.
+
+        Uma linha incompleta no fim é ignorada: pode ser um append de outra
+        sessão ainda em andamento. Com repair=True (só sob o lock de escrita)
+        ela é de fato uma escrita interrompida e é descartada.
+        """
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            self._journal_inode = None
+            self._journal_offset = 0
+            self._journal_records = 0
+            return
+
+        if stat.st_ino != self._journal_inode or stat.st_size < self._journal_offset:
+            # Journal novo (ou truncado por outra compactação): recomeça do início
+            self._journal_inode = stat.st_ino
+            self._journal_offset = 0
+            self._journal_records = 0
+
+        if stat.st_size == self._journal_offset:
+            return
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            chunk = f.read()
+
+        offset = self._journal_offset
+        for line in chunk.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            self._board.apply(record)
+            offset += len(line)
+            self._journal_records += 1
+
+        if repair and offset < stat.st_size:
+            # Escrita interrompida no meio de um registro: descarta a cauda
+            # incompleta para que o próximo append comece numa linha limpa.
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(offset)
+        self._journal_offset = offset
+
+    def _disk_changed(self):
+        # Indica se outro processo gravou desde a nossa última leitura
+        try:
+            if _file_signature(self.path) != self._snapshot_signature:
+                return True
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return self._journal_offset != 0
+        return stat.st_ino != self._journal_inode or stat.st_size != self._journal_offset
+
+    def _refresh(self, repair=False):
+        if self._memory_ahead():
+            # Há mutações ainda não gravadas: o board em memória é o mais novo
+            return self._board
+        self._read_snapshot()
+        self._replay_journal(repair)
+        return self._board
+
+    def load(self):
+        with self._lock:
+            return self._refresh()
+
+    def _write_snapshot(self, payload, board):
+        # Fecha o arquivo atual, lido pelo board gravado ou pelo em memória
+        sources = {
+            column.segment.source
+            for current in (board, self._board) if current is not None
+            for column in current.columns.values() if isinstance(column, LazyColumn)
+        }
+        for source in sources:
+            source.detach()
+        _write_atomic(self.path, payload)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _rebind_segments(self, board):
+        # Liga as colunas aos segmentos do snapshot recém-gravado, liberando a
+        # cópia em memória feita por detach(). Para as ainda não lidas, o
+        # segmento novo é uma cópia do que elas tinham (lê-las na codificação
+        # as teria carregado); as já lidas não voltam a usar o segmento
+        if not self.lazy_columns:
+            return
+        try:
+            source = _SnapshotFile(self.path)
+        except ValueError:
+            return
+        header = {column["key"]: column for column in source.header["columns"]}
+        for column in board.columns.values():
+            entry = header.get(column.key)
+            if isinstance(column, LazyColumn) and entry is not None:
+                column.segment = _Segment(source, entry["offset"], entry["length"], source.header["format"])
+
+    def _encode_board(self, board):
+        if self.lazy_columns:
+            return encode_segmented(board, self.snapshot_format)
+        return encode_snapshot(board.to_dict(), self.snapshot_format)
+
+    def _snapshot_written(self, board):
+        self._board = board
+        self._snapshot_signature = _file_signature(self.path)
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    def save(self, board, expected_version=None):
+        if isinstance(board, dict):
+            board = Board.from_dict(board)
+        with self._write_lock(), self._lock:
+            current = self._refresh(repair=True).version if self.exists() else 0
+            _check_version(current, expected_version)
+            self._discard_pending()
+            board.version = current + 1
+            self._write_snapshot(self._encode_board(board), board)
+            self._snapshot_written(board)
+            self._rebind_segments(board)
+            self._record_history(board=board)
+
+    def _apply_now(self, record, expected_version):
+        with self._write_lock(), self._lock:
+            board = self._refresh(repair=True)
+            _check_version(board.version, expected_version)
+            record = _prepare_record(record, board.version, board.last_id)
+            if not board.apply(record):
+                return None
+            try:
+                self._write_batch([record])
+            except BaseException:
+                # A mutação já está no board em memória, compartilhado entre
+                # as sessões, mas não no disco: descarta o board para que o
+                # próximo load() releia o disco
+                self._board = None
+                raise
+            return record
+
+    def _rebase_on_disk(self, records):
+        # Outro processo gravou desde a nossa última leitura: relê o disco e
+        # renumera nossas mutações (as deste lote e as ainda pendentes) para
+        # depois das dele, reaplicando-as sobre o board relido
+        pending = self._pending
+        previous = self._board
+        self._pending = []
+        self._board = None
+        self._writing = False
+        try:
+            board = self._refresh(repair=True)
+            rebased = _rebase_records(records + pending, board.version, board.last_id)
+            for record in rebased:
+                board.apply(record)
+        except BaseException:
+            self._undo_rebase(previous, pending)
+            raise
+        self._writing = True
+        # Mesmo as que não se aplicam mais ocupam sua versão no journal
+        board.version = max(board.version, rebased[-1]["version"])
+        self._pending = rebased[len(records):]
+        return rebased[:len(records)]
+
+    def _undo_rebase(self, board, pending):
+        super()._undo_rebase(board, pending)
+        # O board restaurado não corresponde ao disco relido: a próxima
+        # gravação precisa ver o disco como alterado e refazer o rebase
+        self._snapshot_signature = None
+        self._journal_inode = None
+
+    def _write_batch(self, records):
+        with self._write_lock():
+            with self._lock:
+                if self._disk_changed():
+                    records = self._rebase_on_disk(records)
+
+            with open(self.journal_path, 'ab') as f:
+                f.write(b''.join(encode_record(record) for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+                offset = f.tell()
+                inode = os.fstat(f.fileno()).st_ino
+
+            with self._lock:
+                self._journal_offset = offset
+                self._journal_inode = inode
+                self._journal_records += len(records)
+                compact_now = self._journal_records >= COMPACT_EVERY
+            self._record_history(records)
+
+            if compact_now:
+                self.compact()
+
+    def compact(self):
+        """Incorpora o journal num novo snapshot e remove o journal."""
+        with self._write_lock():
+            # Só a serialização trava o board em memória; a escrita, não
+            with self._lock:
+                board = self._refresh(repair=True)
+                # As pendentes entram no snapshot sem passar pelo journal
+                self._record_history(self._pending)
+                self._discard_pending()
+                payload = self._encode_board(board)
+            self._write_snapshot(payload, board)
+            with self._lock:
+                self._snapshot_written(board)
+                self._rebind_segments(board)
+
+
+class SqliteBoardStore(BoardStore):
+    """Board em SQLite (WAL), com atualização de uma linha por mutação."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS board_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS board_columns (
+            key TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            column_key TEXT NOT NULL REFERENCES board_columns(key),
+            position INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority TEXT,
+            assignee TEXT,
+            due_date TEXT,
+            created_at TEXT,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS tasks_column ON tasks (column_key, position);
+        CREATE INDEX IF NOT EXISTS tasks_assignee ON tasks (assignee);
+        CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+    """
+
+    def __init__(self, path, snapshot_format=None, lazy_columns=False, **options):
+        # snapshot_format e lazy_columns não se aplicam: o banco tem formato próprio
+        self._conn = None
+        self._reader = None
+        # Trava da conexão de leitura: é sempre a última a ser tomada (depois
+        # de _io_lock e _lock) e nada é travado enquanto ela está tomada
+        self._read_lock = threading.RLock()
+        super().__init__(path, **options)
+        with self._io_lock:
+            self._connect().executescript(self.SCHEMA)
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _connect(self):
+        # Duas conexões para o processo, abertas no primeiro uso: esta, das
+        # gravações, usada só com _io_lock, e a de leitura (_read_conn), usada
+        # só com _read_lock. O Streamlit roda cada execução do script numa
+        # thread nova, e uma conexão por thread seria reaberta a cada rerun
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    def _read_conn(self):
+        # Leituras não passam por _io_lock: load() é chamado com _lock já
+        # tomado (em apply()), e _io_lock vem sempre antes de _lock
+        if self._reader is None:
+            self._reader = self._open()
+        return self._reader
+
+    def exists(self):
+        with self._read_lock:
+            row = self._read_conn().execute("SELECT COUNT(*) FROM board_columns").fetchone()
+        return row[0] > 0
+
+    @staticmethod
+    def _meta(conn, key):
+        row = conn.execute("SELECT value FROM board_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute(
+            "INSERT INTO board_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    @staticmethod
+    def _row_to_task(row):
+        # Mesmo dict que o backend JSON guardaria. Linhas gravadas antes de
+        # ABSENT_KEY não o têm: campos NULL viram None e "column" a coluna
+        extra = json.loads(row["extra"]) if row["extra"] else {}
+        absent = extra.pop(ABSENT_KEY, ())
+        task = {"id": row["id"]}
+        for field in TASK_FIELDS:
+            if row[field] is not None or field not in absent:
+                task[field] = row[field]
+        task.update(extra)
+        if "column" not in task and "column" not in absent:
+            task["column"] = row["column_key"]
+        return task
+
+    @staticmethod
+    def _task_params(task, column_key, position):
+        if isinstance(task, Task):
+            task = task.to_dict()
+        extra = {k: v for k, v in task.items() if k not in TASK_FIELDS and k != "id"}
+        absent = [field for field in TASK_FIELDS + ("column",) if field not in task]
+        if absent:
+            extra[ABSENT_KEY] = absent
+        return (
+            task["id"], column_key, position,
+            *(task.get(field) for field in TASK_FIELDS),
+            json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+
+    def _insert_task(self, conn, task, column_key, position):
+        conn.execute(
+            "INSERT INTO tasks (id, column_key, position, title, description, priority, "
+            "assignee, due_date, created_at, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._task_params(task, column_key, position)
+        )
+
+    @staticmethod
+    def _next_position(conn, column_key):
+        row = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM tasks WHERE column_key = ?",
+            (column_key,)
+        ).fetchone()
+        return row[0]
+
+    def load(self):
+        with self._lock:
+            if self._memory_ahead():
+                # Há mutações ainda não gravadas: o board em memória é o mais novo
+                return self._board
+            with self._read_lock:
+                conn = self._read_conn()
+                version = self._meta(conn, "version")
+                if self._board is not None and self._board.version == version:
+                    return self._board
+                if version == 0 and not self.exists():
+                    # Mesmo comportamento do backend JSON quando o arquivo não existe
+                    raise FileNotFoundError(self.path)
+
+                # Uma transação de leitura: todas as consultas veem a mesma versão
+                conn.execute("BEGIN")
+                try:
+                    version = self._meta(conn, "version")
+                    columns = [
+                        Column(row["key"], row["name"])
+                        for row in conn.execute("SELECT key, name FROM board_columns ORDER BY position")
+                    ]
+                    by_key = {column.key: column for column in columns}
+                    for row in conn.execute("SELECT * FROM tasks ORDER BY column_key, position"):
+                        by_key[row["column_key"]].put(self._row_to_task(row))
+                    last_id = self._meta(conn, "last_id")
+                    archived = self._meta(conn, "archived")
+                finally:
+                    conn.execute("COMMIT")
+
+            self._board = Board(columns, last_id, version, archived)
+            return self._board
+
+    def save(self, board, expected_version=None):
+        if isinstance(board, dict):
+            board = Board.from_dict(board)
+        with self._io_lock, self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._meta(conn, "version")
+                _check_version(version, expected_version)
+                self._discard_pending()
+                conn.execute("DELETE FROM tasks")
+                conn.execute("DELETE FROM board_columns")
+                for position, (key, column) in enumerate(board.columns.items()):
+                    conn.execute(
+                        "INSERT INTO board_columns (key, name, position) VALUES (?, ?, ?)",
+                        (key, column.name, position)
+                    )
+                    for task_position, task in enumerate(column):
+                        self._insert_task(conn, task, key, task_position)
+                version += 1
+                self._set_meta(conn, "last_id", board.last_id)
+                self._set_meta(conn, "archived", board.archived)
+                self._set_meta(conn, "version", version)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            board.version = version
+            self._board = board
+            self._record_history(board=board)
+
+    def _apply_now(self, record, expected_version):
+        with self._io_lock, self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._meta(conn, "version")
+                _check_version(version, expected_version)
+                record = _prepare_record(record, version, self._meta(conn, "last_id"))
+                if not self._apply_row(conn, record):
+                    conn.execute("ROLLBACK")
+                    return None
+                self._set_meta(conn, "version", version + 1)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._record_history([record])
+
+            # Mantém o board em memória em dia sem reler o banco, desde que
+            # ninguém mais tenha escrito desde a última leitura
+            if self._board is not None and self._board.version == version:
+                self._board.apply(record)
+            else:
+                self._board = None
+            return record
+
+    def _write_batch(self, records):
+        with self._io_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._meta(conn, "version")
+                if version != records[0]["version"] - 1:
+                    with self._lock:
+                        records = self._rebase_on_disk(conn, records, version)
+                for record in records:
+                    self._apply_row(conn, record)
+                self._set_meta(conn, "version", records[-1]["version"])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._record_history(records)
+
+    def _rebase_on_disk(self, conn, records, version):
+        # Outro processo gravou desde a nossa última leitura: relê o banco e
+        # renumera nossas mutações (as deste lote e as ainda pendentes) para
+        # depois das dele, reaplicando-as sobre o board relido
+        pending = self._pending
+        previous = self._board
+        self._pending = []
+        self._board = None
+        self._writing = False
+        try:
+            board = self.load()
+            rebased = _rebase_records(records + pending, version, self._meta(conn, "last_id"))
+            for record in rebased:
+                board.apply(record)
+        except BaseException:
+            self._undo_rebase(previous, pending)
+            raise
+        self._writing = True
+        # Mesmo as que não se aplicam mais ocupam sua versão no journal
+        board.version = max(board.version, rebased[-1]["version"])
+        self._pending = rebased[len(records):]
+        return rebased[:len(records)]
+
+    @staticmethod
+    def _update_fields(conn, task_id, fields):
+        fields = {field: value for field, value in fields.items() if field != "id"}
+        columns = [field for field in TASK_FIELDS if field in fields]
+        if columns:
+            conn.execute(
+                f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                (*(fields[c] for c in columns), task_id)
+            )
+        # Os campos informados deixam de ser ausentes; os demais vão para extra
+        row = conn.execute("SELECT extra FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        extra = json.loads(row["extra"]) if row["extra"] else {}
+        absent = [field for field in extra.pop(ABSENT_KEY, ()) if field not in fields]
+        extra.update((field, value) for field, value in fields.items() if field not in TASK_FIELDS)
+        if absent:
+            extra[ABSENT_KEY] = absent
+        conn.execute(
+            "UPDATE tasks SET extra = ? WHERE id = ?",
+            (json.dumps(extra, ensure_ascii=False) if extra else None, task_id)
+        )
+
+    def _apply_row(self, conn, record):
+        op = record["op"]
+
+        if op == "create":
+            task = record["task"]
+            self._insert_task(conn, task, record["column"], self._next_position(conn, record["column"]))
+            self._set_meta(conn, "last_id", task["id"])
+            return True
+
+        if op == "archive":
+            placeholders = ", ".join("?" * len(record["ids"]))
+            archived = conn.execute(
+                f"DELETE FROM tasks WHERE column_key = ? AND id IN ({placeholders})",
+                (record["column"], *record["ids"])
+            ).rowcount
+            if not archived:
+                return False
+            self._set_meta(conn, "archived", self._meta(conn, "archived") + archived)
+            return True
+
+        column_key = record["from"] if op == "move" else record["column"]
+        row = conn.execute("SELECT column_key FROM tasks WHERE id = ?", (record["id"],)).fetchone()
+        if row is None or row["column_key"] != column_key:
+            return False
+
+        if op == "move":
+            conn.execute(
+                "UPDATE tasks SET column_key = ?, position = ? WHERE id = ?",
+                (record["to"], self._next_position(conn, record["to"]), record["id"])
+            )
+            # Como Board.move: os campos e, por último, a nova coluna
+            self._update_fields(conn, record["id"], dict(record.get("fields") or {}, column=record["to"]))
+        elif op == "update":
+            self._update_fields(conn, record["id"], record["fields"])
+        elif op == "delete":
+            conn.execute("DELETE FROM tasks WHERE id = ?", (record["id"],))
+        else:
+            raise ValueError(f"Operação desconhecida: {op}")
+        return True
+
+
+# Um store por arquivo, compartilhado por todas as sessões do processo
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path, **options):
+    """Retorna o store do arquivo, escolhendo o backend pela extensão.
+
+    As opções (commit_delay, max_batch, background, max_pending,
+    snapshot_format, lazy_columns) valem para a primeira abertura do arquivo no processo;
+    as seguintes reaproveitam o mesmo store.
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if path.lower().endswith(SQLITE_EXTENSIONS):
+                store = SqliteBoardStore(path, **options)
+            else:
+                store = JsonBoardStore(path, **options)
+            _stores[key] = store
+        return store
+
+
+def import_json(json_path, db_path, snapshot_format="json", lazy_columns=False):
+    """Importa um board no formato JSON ({"columns": {...}, "last_id": N}) para o SQLite.
+
+    Se o destino também for um snapshot JSON (inclusive o próprio arquivo de
+    origem), o board é regravado em snapshot_format, segmentado se
+    lazy_columns (o formato que o kanban.py grava com LAZY_COLUMNS).
+    """
+    # Lê pelo JsonBoardStore para incluir mutações ainda não compactadas do journal
+    board = JsonBoardStore(json_path).load()
+    store = open_store(db_path, snapshot_format=snapshot_format, lazy_columns=lazy_columns)
+    store.save(board)
+    return store
+
+
+if __name__ == "__main__":
+    # Uso: python kanban_store.py kanban_data.json kanban_data.db
+    #      python kanban_store.py kanban_data.json kanban_data.json gzip
+    #      python kanban_store.py kanban_data.json kanban_data.json json --segmentado
+    args = sys.argv[1:]
+    lazy = "--segmentado" in args
+    if lazy:
+        args.remove("--segmentado")
+    if len(args) not in (2, 3):
+        sys.exit("Uso: python kanban_store.py <board.json> <board.db | board.json> [formato] [--segmentado]")
+    imported = import_json(*args, lazy_columns=lazy)
+    total = len(imported.load())
+    print(f"{total} tarefas importadas para {sys.argv[2]}")
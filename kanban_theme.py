@@ -0,0 +1,38 @@
+import functools
+import hashlib
+import os
+
+import streamlit as st
+
+# Tema compartilhado pelos apps (kanban.py, app0.py e app1.py).
+#
+# A folha de estilo fica em static/kanban.css e é servida pelo próprio
+# Streamlit em app/static/ (server.enableStaticServing, ligado em
+# .streamlit/config.toml). A página recebe só um <link> com a versão do
+# arquivo na URL: o navegador baixa o CSS uma vez e o reaproveita do cache
+# nos reruns seguintes, até o arquivo mudar. Sem o static serving ligado, o
+# CSS é enviado inline como antes.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STYLESHEET = "kanban.css"
+
+
+@functools.lru_cache(maxsize=1)
+def _stylesheet(path, signature):
+    # signature (mtime e tamanho) faz o cache valer até o arquivo mudar
+    with open(path, 'rb') as f:
+        css = f.read()
+    return css.decode('utf-8'), hashlib.sha1(css).hexdigest()[:12]
+
+
+def apply_theme():
+    """Aplica a folha de estilo do kanban à página."""
+    path = os.path.join(STATIC_DIR, STYLESHEET)
+    stat = os.stat(path)
+    css, version = _stylesheet(path, (stat.st_mtime_ns, stat.st_size))
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(
+            f'<link rel="stylesheet" href="app/static/{STYLESHEET}?v={version}">',
+            unsafe_allow_html=True
+        )
+    else:
+        st.markdown(f"<style>\n{css}</style>", unsafe_allow_html=True)
@@ -0,0 +1,92 @@
+import collections
+import functools
+
+# Partes da interface do kanban.py que precisam sobreviver aos reruns do
+# Streamlit: o script é reexecutado a cada interação, mas este módulo é
+# importado uma vez por processo, então seus caches valem para todas as
+# sessões.
+
+# Número de cards com HTML pronto guardados em memória
+CARD_CACHE_SIZE = 4096
+
+# Destaque do card pelo prazo (DeadlineIndex.status)
+DUE_CLASSES = {
+    "overdue": "task-overdue",
+    "soon": "task-due-soon"
+}
+
+PRIORITY_CLASSES = {
+    "Alta": ("task-high", "priority-high"),
+    "Média": ("task-medium", "priority-medium"),
+    "Baixa": ("task-low", "priority-low")
+}
+
+
+# Dados de exibição de um card, derivados uma vez da tarefa
+CardView = collections.namedtuple("CardView", [
+    "priority", "card_class", "badge_class", "title", "description",
+    "assignee", "due_text", "created_text", "html"
+])
+
+
+def card_view(task):
+    """View-model do card, guardado na própria tarefa (task.view).
+
+    É calculado na primeira exibição e de novo só depois que a tarefa muda
+    (Task descarta task.view a cada alteração).
+    """
+    view = task.view
+    if view is None:
+        view = _card_view(
+            task.id,
+            task.priority_label,
+            task.get("title"),
+            task.get("description"),
+            task.get("assignee"),
+            task.due,
+            task.created
+        )
+        task.view = view
+    return view
+
+
+def card_html(task, due_status=None):
+    """HTML do corpo do card, num único bloco.
+
+    due_status ("overdue" ou "soon") acrescenta a classe de destaque do
+    prazo, que muda com a data e por isso fica fora do view-model.
+    """
+    html = card_view(task).html
+    if due_status in DUE_CLASSES:
+        html = html.replace('class="task-card ', f'class="task-card {DUE_CLASSES[due_status]} ', 1)
+    return html
+
+
+@functools.lru_cache(maxsize=CARD_CACHE_SIZE)
+def _card_view(task_id, priority, title, description, assignee, due, created):
+    # Memoizado também pelos campos exibidos: tarefas recriadas ao reler o
+    # board do disco reaproveitam o view-model de antes, se nada mudou
+    card_class, badge_class = PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES["Média"])
+    if description and len(description) > 80:
+        description = description[:80] + "..."
+    due_text = due.strftime("%d/%m/%Y") if due else None
+    created_text = created.strftime("%d/%m") if created else "-"
+
+    parts = [
+        f'<div class="task-card {card_class}">',
+        f'<div class="priority-badge {badge_class}">{priority}</div>',
+        f'<div class="task-title">{title}</div>'
+    ]
+    if description:
+        parts.append(f'<div class="task-description">{description}</div>')
+    if assignee:
+        parts.append(f'<div class="task-info">👤 {assignee}</div>')
+    if due_text:
+        parts.append(f'<div class="task-info">📅 {due_text}</div>')
+    parts.append(f'<div class="task-meta">ID: #{task_id} • Criado: {created_text}</div>')
+    parts.append('</div>')
+
+    return CardView(
+        priority, card_class, badge_class, title, description,
+        assignee, due_text, created_text, "".join(parts)
+    )
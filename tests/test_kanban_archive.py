@@ -0,0 +1,64 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import kanban_archive
+import kanban_store
+
+
+def done_task(task_id, title, completed, assignee=None):
+    task = {"id": task_id, "title": title, "completed_at": completed}
+    if assignee is not None:
+        task["assignee"] = assignee
+    return task
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return kanban_archive.TaskArchive(str(tmp_path / "board.json"))
+
+
+def test_add_groups_by_month_and_skips_archived(archive):
+    assert archive.add([
+        done_task(1, "Janeiro", "2026-01-10T00:00:00"),
+        done_task(2, "Fevereiro", "2026-02-10T00:00:00"),
+        done_task(3, "Janeiro de novo", "2026-01-20T00:00:00")
+    ]) == 3
+    assert archive.add([done_task(1, "Repetida", "2026-03-01T00:00:00"),
+                        done_task(4, "Janeiro tardio", "2026-01-30T00:00:00")]) == 1
+    assert len(archive) == 4
+    assert 1 in archive and 5 not in archive
+    assert sorted(os.listdir(os.path.join(archive.path, "2026-01"))) == ["0001.json.gz", "0002.json.gz"]
+    assert archive.get(1)["title"] == "Janeiro"
+    assert archive.get(5) is None
+
+    # Outra instância lê o mesmo índice do disco
+    reopened = kanban_archive.TaskArchive(archive.path[:-len(kanban_archive.ARCHIVE_SUFFIX)])
+    assert [summary["id"] for summary in reopened.summaries()] == [2, 4, 3, 1]
+
+
+def test_search_returns_most_recent_first(archive):
+    archive.add([
+        done_task(1, "Relatório", "2026-01-01T00:00:00"),
+        done_task(2, "Outra", "2026-03-01T00:00:00", assignee="Ana Relatório"),
+        done_task(3, "relatório final", "2026-02-01T00:00:00")
+    ])
+    assert [summary["id"] for summary in archive.search("RELATÓRIO")] == [2, 3, 1]
+    assert [summary["id"] for summary in archive.search("relatório", limit=2)] == [2, 3]
+    assert archive.search("  ") == []
+
+
+def test_archive_column_moves_old_tasks(tmp_path, archive):
+    store = kanban_store.JsonBoardStore(str(tmp_path / "board.json"))
+    store.save({"columns": {"done": {"name": "Concluído", "tasks": [
+        done_task(1, "Antiga", "2026-01-01T00:00:00"),
+        done_task(2, "Recente", "2026-10-10T00:00:00"),
+        {"id": 3, "title": "Sem conclusão", "created_at": "2025-12-01T00:00:00"}
+    ]}}, "last_id": 3})
+    assert kanban_archive.archive_column(store, archive, "done", 30, now=datetime(2026, 10, 15)) == 2
+    board = kanban_store.JsonBoardStore(store.path).load()
+    assert [task.id for task in board.columns["done"]] == [2]
+    assert board.archived == 2
+    assert archive.get(3)["title"] == "Sem conclusão"
+    assert kanban_archive.archive_column(store, archive, "done", 30, now=datetime(2026, 10, 15)) == 0
@@ -0,0 +1,115 @@
+from datetime import date, datetime
+
+from kanban_board import Board, Priority, Task
+
+
+def board_data():
+    return {
+        "columns": {
+            "backlog": {"name": "Backlog", "tasks": [
+                {
+                    "id": 1, "title": "Completa", "description": "x", "priority": "Alta",
+                    "assignee": "Ana", "due_date": "2026-10-01",
+                    "created_at": "2026-01-01T08:30:00", "column": "backlog", "tag": [1, 2]
+                },
+                {"id": 2, "title": "Só título"}
+            ]},
+            "done": {"name": "Concluído", "tasks": [
+                {"id": 3, "title": "Datas fora do formato", "due_date": "2026-10-01T00:00:00",
+                 "created_at": "2026-01-01", "priority": "Urgente"}
+            ]}
+        },
+        "last_id": 3,
+        "version": 7,
+        "archived": 2
+    }
+
+
+def test_task_converts_values_and_round_trips():
+    original = board_data()["columns"]["backlog"]["tasks"][0]
+    task = Task(dict(original))
+    assert task.priority is Priority.ALTA
+    assert task.due == date(2026, 10, 1)
+    assert task.created == datetime(2026, 1, 1, 8, 30)
+    assert task["due_date"] == "2026-10-01"
+    assert task.extra == {"tag": [1, 2]}
+    assert task.to_dict() == original
+
+
+def test_task_keeps_missing_fields_missing():
+    task = Task({"id": 2, "title": "Só título"})
+    assert task.to_dict() == {"id": 2, "title": "Só título"}
+    assert "due_date" not in task
+    assert task.get("assignee", "-") == "-"
+    assert task.priority_label == "Média"
+
+
+def test_task_keeps_non_canonical_text():
+    original = board_data()["columns"]["done"]["tasks"][0]
+    task = Task(dict(original))
+    assert task.to_dict() == original
+    assert task.due == date(2026, 10, 1)
+    assert task.priority_label == "Urgente"
+
+
+def test_board_round_trip():
+    data = board_data()
+    board = Board.from_dict(board_data())
+    assert board.to_dict() == data
+    assert len(board) == 3
+    assert board.column_of(3) == "done"
+    assert board.get(2)["title"] == "Só título"
+
+
+def test_board_renumbers_duplicate_ids():
+    data = board_data()
+    data["columns"]["done"]["tasks"].append({"id": 1, "title": "Duplicada"})
+    board = Board.from_dict(data)
+    assert board.last_id == 4
+    assert board.get(4)["title"] == "Duplicada"
+    assert board.get(1)["title"] == "Completa"
+
+
+def test_board_apply_records():
+    board = Board.from_dict(board_data())
+    assert board.apply({"op": "create", "version": 8, "column": "backlog", "task": {"id": 4, "title": "Nova"}})
+    assert board.apply({"op": "move", "version": 9, "id": 4, "from": "backlog", "to": "done",
+                        "fields": {"completed_at": "2026-10-02T00:00:00"}})
+    assert board.get(4).to_dict() == {
+        "id": 4, "title": "Nova", "completed_at": "2026-10-02T00:00:00", "column": "done"
+    }
+    # Origem errada, versão já incorporada: não se aplicam
+    assert not board.apply({"op": "move", "version": 10, "id": 4, "from": "backlog", "to": "done"})
+    assert not board.apply({"op": "delete", "version": 9, "id": 4, "column": "done"})
+    assert board.apply({"op": "update", "version": 10, "id": 2, "column": "backlog", "fields": {"title": "Editada"}})
+    assert board.apply({"op": "archive", "version": 11, "column": "done", "ids": [3, 4]})
+    assert board.version == 11
+    assert board.archived == 4
+    assert [task["title"] for task in board.columns["backlog"]] == ["Completa", "Editada"]
+    assert len(board.columns["done"]) == 0
+
+
+def test_column_orders_follow_mutations():
+    board = Board.from_dict({"columns": {"backlog": {"name": "Backlog", "tasks": [
+        {"id": 1, "title": "a", "priority": "Baixa", "due_date": "2026-10-03", "created_at": "2026-01-03T00:00:00"},
+        {"id": 2, "title": "b", "priority": "Alta", "created_at": "2026-01-01T00:00:00"},
+        {"id": 3, "title": "c", "priority": "Alta", "due_date": "2026-10-01", "created_at": "2026-01-02T00:00:00"}
+    ]}}, "last_id": 3})
+    column = board.columns["backlog"]
+
+    def ids(mode):
+        return [task.id for task in column.ordered(mode, 0, 10)]
+
+    assert ids("manual") == [1, 2, 3]
+    assert ids("priority") == [3, 2, 1]
+    assert ids("due") == [3, 1, 2]
+    assert ids("created") == [2, 3, 1]
+
+    # Ordenações já montadas são mantidas a cada mutação
+    board.update(2, "backlog", {"due_date": "2026-09-30"})
+    board.delete(3, "backlog")
+    board.add("backlog", {"id": 4, "title": "d", "priority": "Alta", "created_at": "2025-12-31T00:00:00"})
+    assert ids("priority") == [2, 4, 1]
+    assert ids("due") == [2, 1, 4]
+    assert ids("created") == [4, 2, 1]
+    assert [task.id for task in column.ordered("due", 1, 2)] == [1]
@@ -0,0 +1,89 @@
+from datetime import date
+
+from kanban_board import Board, Task
+from kanban_filter import DeadlineIndex, FilterIndex
+
+
+def task(task_id, assignee=None, priority=None, due_date=None):
+    data = {"id": task_id, "title": f"t{task_id}"}
+    if assignee is not None:
+        data["assignee"] = assignee
+    if priority is not None:
+        data["priority"] = priority
+    if due_date is not None:
+        data["due_date"] = due_date
+    return Task(data)
+
+
+def test_filter_index_intersects_criteria():
+    index = FilterIndex()
+    index.extend([
+        task(1, "Ana", "Alta", "2026-10-01"),
+        task(2, "ana ", "Baixa", "2026-10-05"),
+        task(3, "João", "Alta", "2026-10-10"),
+        task(4, None, None, None)
+    ])
+    assert index.match() is None
+    # Responsável sem diferença de maiúsculas, acentos e espaços nas pontas
+    assert index.match(assignees=["ANA"]) == {1, 2}
+    assert index.match(assignees=["joao", "Ana"], priorities=["Alta"]) == {1, 3}
+    assert index.match(priorities=["Média"]) == {4}
+    assert index.match(assignees=[""]) == {4}
+    assert index.match(due_from=date(2026, 10, 5)) == {2, 3}
+    assert index.match(due_to=date(2026, 10, 5)) == {1, 2}
+    assert index.match(priorities=["Alta"], due_from=date(2026, 10, 2), due_to=date(2026, 10, 31)) == {3}
+
+
+def test_filter_index_follows_edits_and_removals():
+    index = FilterIndex()
+    index.extend([task(1, "Ana", "Alta", "2026-10-01"), task(2, "Ana", "Alta", "2026-10-01")])
+    index.add(task(1, "Bia", "Baixa", "2026-11-01"))
+    index.remove(2)
+    assert index.match(assignees=["Ana"]) == set()
+    assert index.match(assignees=["Bia"], priorities=["Baixa"]) == {1}
+    assert index.match(due_to=date(2026, 10, 31)) == set()
+    assert len(index) == 1
+
+
+def test_deadline_index_skips_closed_columns():
+    columns = {1: "backlog", 2: "backlog", 3: "done", 4: "backlog"}
+    index = DeadlineIndex(columns.get)
+    index.extend([
+        task(1, due_date="2026-10-01"),
+        task(2, due_date="2026-10-16"),
+        task(3, due_date="2026-09-01"),
+        task(4)
+    ])
+    today = date(2026, 10, 15)
+    assert index.overdue(today) == (1, [(date(2026, 10, 1).toordinal(), 1)])
+    assert index.due_within(today, 3) == (1, [(date(2026, 10, 16).toordinal(), 2)])
+    assert index.next_deadline(today) == (date(2026, 10, 16).toordinal(), 2)
+    assert index.status(1, today, 3) == "overdue"
+    assert index.status(2, today, 3) == "soon"
+    assert index.status(3, today, 3) is None
+
+    # Concluída sai do índice
+    columns[1] = "done"
+    index.add(task(1, due_date="2026-10-01"))
+    assert index.overdue(today) == (0, [])
+
+
+def test_deadline_index_limits_results():
+    index = DeadlineIndex(lambda task_id: "backlog")
+    index.extend(task(task_id, due_date=f"2026-10-{task_id:02d}") for task_id in range(1, 11))
+    count, first = index.overdue(date(2026, 10, 20), limit=3)
+    assert count == 10
+    assert [task_id for _, task_id in first] == [1, 2, 3]
+
+
+def test_board_deadlines_follow_moves():
+    board = Board.from_dict({"columns": {
+        "backlog": {"name": "Backlog", "tasks": [{"id": 1, "title": "a", "due_date": "2026-10-01"}]},
+        "done": {"name": "Concluído", "tasks": [{"id": 2, "title": "b", "due_date": "2026-10-01"}]}
+    }, "last_id": 2})
+    today = date(2026, 10, 15)
+    assert board.deadlines().overdue(today)[0] == 1
+    board.move(1, "backlog", "done")
+    board.move(2, "done", "backlog")
+    assert board.deadlines().overdue(today) == (1, [(date(2026, 10, 1).toordinal(), 2)])
+    assert board.filter(due_to=date(2026, 10, 1)) == {1, 2}
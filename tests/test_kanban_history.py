@@ -0,0 +1,76 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import kanban_history
+import kanban_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = kanban_store.JsonBoardStore(str(tmp_path / "board.json"))
+    store.save({"columns": {
+        "backlog": {"name": "Backlog", "tasks": []},
+        "done": {"name": "Concluído", "tasks": []}
+    }, "last_id": 0})
+    store.set_history(kanban_history.TaskHistory(store.path))
+    return store
+
+
+def checkpoint():
+    # Instante entre duas mutações (o horário dos eventos tem milissegundos)
+    time.sleep(0.01)
+    when = datetime.now()
+    time.sleep(0.01)
+    return when
+
+
+def counts(board):
+    return {key: len(column) for key, column in board.columns.items()}
+
+
+def test_board_as_of_replays_events(store, monkeypatch):
+    # Snapshots frequentes: a reconstrução parte do snapshot certo
+    monkeypatch.setattr(kanban_history, "SNAPSHOT_EVERY", 2)
+    before = datetime.now() - timedelta(days=1)
+    moments = [checkpoint()]
+    for title in ("a", "b", "c"):
+        store.apply({"op": "create", "column": "backlog", "task": {"title": title}})
+        moments.append(checkpoint())
+    store.apply({"op": "move", "id": 1, "from": "backlog", "to": "done"})
+    moments.append(checkpoint())
+    store.apply({"op": "delete", "id": 2, "column": "backlog"})
+
+    history = store.history
+    assert history.board_as_of(before) is None
+    expected = [
+        {"backlog": 0, "done": 0},
+        {"backlog": 1, "done": 0},
+        {"backlog": 2, "done": 0},
+        {"backlog": 3, "done": 0},
+        {"backlog": 2, "done": 1}
+    ]
+    assert [counts(history.board_as_of(when)) for when in moments] == expected
+    assert counts(history.board_as_of(datetime.now())) == counts(store.load())
+
+    # Reaberto do disco, o histórico responde igual
+    reopened = kanban_history.TaskHistory(store.path)
+    assert [counts(reopened.board_as_of(when)) for when in moments] == expected
+
+
+def test_is_current_after_last_event(store):
+    store.apply({"op": "create", "column": "backlog", "task": {"title": "a"}})
+    middle = checkpoint()
+    store.apply({"op": "create", "column": "backlog", "task": {"title": "b"}})
+    assert not store.history.is_current(middle)
+    assert store.history.is_current(datetime.now())
+    assert kanban_history.TaskHistory(store.path).is_current(datetime.now())
+
+
+def test_task_events(store):
+    store.apply({"op": "create", "column": "backlog", "task": {"title": "a"}})
+    store.apply({"op": "create", "column": "backlog", "task": {"title": "b"}})
+    store.apply({"op": "move", "id": 1, "from": "backlog", "to": "done"})
+    store.apply({"op": "archive", "column": "done", "ids": [1]})
+    assert [event["op"] for event in store.history.task_events(1)] == ["create", "move", "archive"]
@@ -0,0 +1,56 @@
+from kanban_board import Board, Task
+from kanban_search import SearchIndex, tokenize
+
+
+def task(task_id, title, description="", assignee=""):
+    return Task({"id": task_id, "title": title, "description": description, "assignee": assignee})
+
+
+def test_tokenize_folds_accents_and_case():
+    assert tokenize("Revisão do CÓDIGO, v2") == ["revisao", "do", "codigo", "v2"]
+    assert tokenize(None) == []
+
+
+def test_search_requires_all_terms_and_ranks_by_field():
+    index = SearchIndex()
+    index.extend([
+        task(1, "Relatório mensal", "enviar para a revisão"),
+        task(2, "Revisão do relatório"),
+        task(3, "Outra coisa", "relatório", assignee="Revisão Ltda")
+    ])
+    # Pesos por campo: título 3, responsável 2, descrição 1
+    assert index.search("revisao relatorio") == [2, 1, 3]
+    assert index.search("relatorio inexistente") == []
+    assert index.search("") == []
+
+
+def test_last_term_matches_as_prefix():
+    index = SearchIndex()
+    index.extend([task(1, "Implementar login"), task(2, "Implantação"), task(3, "Impressora")])
+    assert sorted(index.search("impl")) == [1, 2]
+    # Só o último termo vale como prefixo
+    assert index.search("impl login") == []
+    assert index.search("implementar lo") == [1]
+
+
+def test_index_follows_edits_and_removals():
+    index = SearchIndex()
+    index.extend([task(1, "Alfa"), task(2, "Beta")])
+    index.add(task(1, "Gama"))
+    index.remove(2)
+    assert index.search("alfa") == []
+    assert index.search("gama") == [1]
+    assert index.search("beta") == []
+    assert len(index) == 1
+
+
+def test_board_search_is_kept_up_to_date():
+    board = Board.from_dict({"columns": {"a": {"name": "A", "tasks": [
+        {"id": 1, "title": "Corrigir bug"}
+    ]}}, "last_id": 1})
+    assert [t.id for t in board.search("bug")] == [1]
+    board.add("a", {"id": 2, "title": "Outro bug"})
+    board.update(1, "a", {"title": "Corrigir erro"})
+    assert [t.id for t in board.search("bug")] == [2]
+    board.delete(2, "a")
+    assert board.search("bug") == []
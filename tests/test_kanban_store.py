@@ -0,0 +1,375 @@
+import datetime
+import errno
+import json
+import threading
+import time
+
+import pytest
+
+import kanban_store
+
+
+def empty_board():
+    return {
+        "columns": {
+            "backlog": {"name": "Backlog", "tasks": []},
+            "done": {"name": "Concluído", "tasks": []}
+        },
+        "last_id": 0
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "board.json")
+    kanban_store.JsonBoardStore(path).save(empty_board())
+    return path
+
+
+def create(store, title, column="backlog"):
+    return store.apply({"op": "create", "column": column, "task": {"title": title}})
+
+
+def titles(board):
+    return {column.key: [task["title"] for task in column] for column in board.columns.values()}
+
+
+def test_journal_replay_ignores_torn_write(path):
+    store = kanban_store.JsonBoardStore(path)
+    create(store, "a")
+    moved = create(store, "b")
+    store.apply({"op": "move", "id": moved["task"]["id"], "from": "backlog", "to": "done"})
+
+    # Processo interrompido no meio da gravação de uma linha do journal
+    with open(path + kanban_store.JOURNAL_SUFFIX, "a", encoding="utf-8") as journal:
+        journal.write('{"op": "delete", "id": 1, "col')
+
+    board = kanban_store.JsonBoardStore(path).load()
+    assert titles(board) == {"backlog": ["a"], "done": ["b"]}
+    assert board.version == 4
+
+    # A linha incompleta não atrapalha as gravações seguintes
+    create(kanban_store.JsonBoardStore(path), "c")
+    board = kanban_store.JsonBoardStore(path).load()
+    assert titles(board) == {"backlog": ["a", "c"], "done": ["b"]}
+    assert board.last_id == 3
+
+
+def test_two_stores_on_one_file_never_share_ids(path):
+    first = kanban_store.JsonBoardStore(path)
+    second = kanban_store.JsonBoardStore(path)
+    stale = first.load().version
+
+    def work(store, prefix):
+        for number in range(50):
+            create(store, f"{prefix}{number}")
+
+    threads = [
+        threading.Thread(target=work, args=(store, prefix))
+        for store, prefix in ((first, "a"), (second, "b"))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    board = kanban_store.JsonBoardStore(path).load()
+    ids = [task.id for column in board.columns.values() for task in column]
+    assert len(ids) == 100
+    assert sorted(ids) == list(range(1, 101))
+    assert board.last_id == 100
+
+    # Quem gravou com base numa versão antiga recebe conflito
+    with pytest.raises(kanban_store.ConflictError):
+        first.apply({"op": "delete", "id": 1, "column": "backlog"}, expected_version=stale)
+
+
+def test_deferred_writes_reach_disk_on_flush(path):
+    # Atraso longo: nada é gravado antes do flush explícito
+    store = kanban_store.JsonBoardStore(path, commit_delay=60)
+    for title in ("a", "b", "c"):
+        create(store, title)
+    store.apply({"op": "move", "id": 2, "from": "backlog", "to": "done"})
+    assert titles(store.load()) == {"backlog": ["a", "c"], "done": ["b"]}
+    assert kanban_store.JsonBoardStore(path).load().version == 1
+
+    store.flush()
+    board = kanban_store.JsonBoardStore(path).load()
+    assert titles(board) == {"backlog": ["a", "c"], "done": ["b"]}
+    assert board.version == store.load().version == 5
+    store.close()
+
+
+def test_background_writes_reach_disk_on_close(path):
+    store = kanban_store.JsonBoardStore(path, commit_delay=0.05, background=True)
+    for number in range(20):
+        create(store, f"t{number}")
+    store.apply({"op": "delete", "id": 1, "column": "backlog"})
+    expected = titles(store.load())
+
+    store.close()
+    assert store.write_error is None
+    board = kanban_store.JsonBoardStore(path).load()
+    assert titles(board) == expected
+    assert board.version == 22
+    assert board.last_id == 20
+
+
+def test_sqlite_round_trip_matches_json_backend(tmp_path):
+    data = {
+        "columns": {
+            "backlog": {"name": "Backlog", "tasks": [
+                {"id": 1, "title": "só título"},
+                {
+                    "id": 2, "title": "completa", "description": None, "priority": "Alta",
+                    "assignee": "Ana", "due_date": "2026-10-01",
+                    "created_at": "2026-01-01T00:00:00", "column": "a_fazer", "tag": "x"
+                }
+            ]},
+            "done": {"name": "Concluído", "tasks": []}
+        },
+        "last_id": 2
+    }
+    stores = [
+        kanban_store.JsonBoardStore(str(tmp_path / "board.json")),
+        kanban_store.SqliteBoardStore(str(tmp_path / "board.db"))
+    ]
+    for store in stores:
+        store.save(json.loads(json.dumps(data)))
+        store.apply({"op": "move", "id": 1, "from": "backlog", "to": "done",
+                     "fields": {"completed_at": "2026-10-02T00:00:00"}})
+        store.apply({"op": "update", "id": 2, "column": "backlog", "fields": {"assignee": None}})
+        create(store, "nova")
+
+    json_board, sqlite_board = (type(store)(store.path).load().to_dict() for store in stores)
+    assert sqlite_board == json_board
+    # Campos ausentes continuam ausentes, e "column" é o valor gravado na tarefa
+    first = sqlite_board["columns"]["done"]["tasks"][0]
+    assert first == {"id": 1, "title": "só título", "column": "done", "completed_at": "2026-10-02T00:00:00"}
+    assert sqlite_board["columns"]["backlog"]["tasks"][0]["column"] == "a_fazer"
+
+
+def test_deadlines_come_from_segmented_header(tmp_path):
+    path = str(tmp_path / "lazy.json")
+    board = {"columns": {
+        "backlog": {"name": "Backlog", "tasks": [
+            {"id": 1, "title": "a", "due_date": "2026-10-01"},
+            {"id": 2, "title": "b"}
+        ]},
+        "done": {"name": "Concluído", "tasks": [{"id": 3, "title": "c", "due_date": "2026-09-01"}]}
+    }, "last_id": 3}
+    kanban_store.JsonBoardStore(path, lazy_columns=True).save(board)
+
+    store = kanban_store.JsonBoardStore(path, lazy_columns=True)
+    create(store, "nova")
+    store.apply({"op": "update", "id": 4, "column": "backlog", "fields": {"due_date": "2026-10-02"}})
+    loaded = store.load()
+    deadlines = loaded.deadlines()
+    today = datetime.date(2026, 10, 15)
+    assert deadlines.overdue(today)[0] == 2
+    assert deadlines.status(1, today, 3) == "overdue"
+    # Nenhuma coluna precisou ser decodificada para montar os prazos
+    assert loaded.columns["done"].pristine
+
+
+@pytest.mark.parametrize("store_class, name", [
+    (kanban_store.JsonBoardStore, "board.json"),
+    (kanban_store.SqliteBoardStore, "board.db")
+])
+def test_pending_archive_is_rebased_after_foreign_write(tmp_path, monkeypatch, store_class, name):
+    path = str(tmp_path / name)
+    data = empty_board()
+    data["columns"]["done"]["tasks"].append({"id": 1, "title": "antiga"})
+    data["last_id"] = 1
+    store_class(path).save(data)
+
+    store = store_class(path, commit_delay=60)
+    mine = create(store, "minha", "done")
+    store.apply({"op": "archive", "column": "done", "ids": [1, mine["task"]["id"]]})
+    create(store_class(path), "alheia")
+
+    # Rebase que falha: os registros pendentes continuam na fila
+    def fail(*args):
+        raise RuntimeError("falha no rebase")
+    monkeypatch.setattr(kanban_store, "_rebase_records", fail)
+    with pytest.raises(RuntimeError):
+        store.flush()
+    assert len(store._pending) == 2
+    monkeypatch.undo()
+
+    # Renumerada, a tarefa criada aqui ainda é a que sai no arquivamento
+    store.flush()
+    board = store_class(path).load()
+    assert titles(board) == {"backlog": ["alheia"], "done": []}
+    assert board.archived == 2
+    assert board.version == store.load().version == 4
+    store.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "board.db")
+    kanban_store.SqliteBoardStore(path).save(empty_board())
+    return path
+
+
+def test_two_sqlite_stores_on_one_file_never_share_ids(db_path):
+    first = kanban_store.SqliteBoardStore(db_path)
+    second = kanban_store.SqliteBoardStore(db_path, commit_delay=0.01)
+    stale = first.load().version
+
+    def work(store, prefix):
+        for number in range(50):
+            create(store, f"{prefix}{number}")
+
+    threads = [
+        threading.Thread(target=work, args=(store, prefix))
+        for store, prefix in ((first, "a"), (second, "b"))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    second.flush()
+
+    board = kanban_store.SqliteBoardStore(db_path).load()
+    ids = [task.id for column in board.columns.values() for task in column]
+    assert sorted(ids) == list(range(1, 101))
+    assert board.last_id == 100
+    assert first.load().version == second.load().version == board.version
+
+    with pytest.raises(kanban_store.ConflictError):
+        first.apply({"op": "delete", "id": 1, "column": "backlog"}, expected_version=stale)
+    second.close()
+
+
+def test_sqlite_reads_during_group_commit_do_not_deadlock(db_path):
+    # load() e o flush em segundo plano disputam a conexão e os locks
+    store = kanban_store.SqliteBoardStore(db_path, commit_delay=0.01)
+    other = kanban_store.SqliteBoardStore(db_path)
+    stop = time.monotonic() + 1.5
+    created = []
+
+    def writer():
+        while time.monotonic() < stop:
+            created.append(create(store, "a")["task"]["id"])
+
+    def foreign():
+        while time.monotonic() < stop:
+            create(other, "b")
+            time.sleep(0.005)
+
+    def reader():
+        while time.monotonic() < stop:
+            store.load()
+
+    threads = [threading.Thread(target=work, daemon=True) for work in (writer, foreign, reader, reader, reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(stop + 10 - time.monotonic())
+    assert not any(thread.is_alive() for thread in threads)
+
+    store.close()
+    board = kanban_store.SqliteBoardStore(db_path).load()
+    ids = [task.id for task in board.columns["backlog"]]
+    assert len(ids) == len(set(ids)) == board.last_id
+    assert sum(1 for task in board.columns["backlog"] if task["title"] == "a") == len(created)
+
+
+def lazy_board():
+    return {"columns": {
+        "backlog": {"name": "Backlog", "tasks": [{"id": 1, "title": "a"}, {"id": 2, "title": "b"}]},
+        "done": {"name": "Concluído", "tasks": [{"id": 3, "title": "c"}]}
+    }, "last_id": 3}
+
+
+def test_segmented_snapshot_reads_columns_on_demand(tmp_path):
+    path = str(tmp_path / "lazy.json")
+    kanban_store.JsonBoardStore(path, lazy_columns=True).save(lazy_board())
+    with open(path, 'rb') as f:
+        assert f.read(len(kanban_store.SEGMENTED_MAGIC)) == kanban_store.SEGMENTED_MAGIC
+
+    store = kanban_store.JsonBoardStore(path, lazy_columns=True)
+    store.apply({"op": "move", "id": 1, "from": "backlog", "to": "done"})
+    board = store.load()
+    # Mover para uma coluna não lida não obriga a decodificá-la
+    assert len(board.columns["done"]) == 2
+    assert not board.columns["backlog"].pristine
+    assert board.columns["done"].task_ids() == [3, 1]
+    assert titles(kanban_store.JsonBoardStore(path).load()) == {"backlog": ["b"], "done": ["c", "a"]}
+
+
+def test_compaction_releases_segmented_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "lazy.json")
+    kanban_store.JsonBoardStore(path, lazy_columns=True).save(lazy_board())
+    store = kanban_store.JsonBoardStore(path, lazy_columns=True)
+    store.apply({"op": "update", "id": 1, "column": "backlog", "fields": {"title": "a2"}})
+    board = store.load()
+    old_sources = {column.segment.source for column in board.columns.values()}
+
+    # Nenhum arquivo segmentado pode estar aberto na troca (no Windows, o
+    # os.replace falharia)
+    write_atomic = kanban_store._write_atomic
+
+    def checked_write(target, payload):
+        assert all(source._file.closed for source in old_sources)
+        write_atomic(target, payload)
+    monkeypatch.setattr(kanban_store, "_write_atomic", checked_write)
+    store.compact()
+
+    # As colunas passam a ler do snapshot novo, inclusive a não lida
+    assert board.columns["done"].pristine
+    assert all(column.segment.source not in old_sources for column in board.columns.values())
+    assert board.columns["done"].segment() == [{"id": 3, "title": "c"}]
+    assert titles(kanban_store.JsonBoardStore(path).load()) == {"backlog": ["a2", "b"], "done": ["c"]}
+
+
+def test_import_writes_segmented_snapshot(tmp_path):
+    source = str(tmp_path / "plain.json")
+    target = str(tmp_path / "lazy.json")
+    kanban_store.JsonBoardStore(source).save(lazy_board())
+    kanban_store.import_json(source, target, lazy_columns=True).close()
+    with open(target, 'rb') as f:
+        assert f.read(len(kanban_store.SEGMENTED_MAGIC)) == kanban_store.SEGMENTED_MAGIC
+    assert titles(kanban_store.JsonBoardStore(target).load()) == {"backlog": ["a", "b"], "done": ["c"]}
+
+
+def fail_encoding(*args):
+    raise OSError(errno.ENOSPC, "No space left on device")
+
+
+def test_failed_journal_append_leaves_memory_as_on_disk(path, monkeypatch):
+    store = kanban_store.JsonBoardStore(path)
+    created = create(store, "a")
+    monkeypatch.setattr(kanban_store, "encode_record", fail_encoding)
+    with pytest.raises(OSError):
+        store.apply({"op": "delete", "id": created["task"]["id"], "column": "backlog"})
+    monkeypatch.undo()
+
+    board = store.load()
+    assert titles(board) == {"backlog": ["a"], "done": []}
+    assert board.version == kanban_store.JsonBoardStore(path).load().version
+    create(store, "b")
+    assert titles(kanban_store.JsonBoardStore(path).load()) == {"backlog": ["a", "b"], "done": []}
+
+
+def test_failed_timed_flush_is_reported_and_retried(path, monkeypatch):
+    monkeypatch.setattr(kanban_store, "RETRY_DELAY", 0.05)
+    monkeypatch.setattr(kanban_store, "encode_record", fail_encoding)
+    store = kanban_store.JsonBoardStore(path, commit_delay=0.02)
+    create(store, "a")
+    deadline = time.monotonic() + 5
+    while store.write_error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert isinstance(store.write_error, OSError)
+    assert len(store._pending) == 1
+
+    # Sem chamar flush(): a nova tentativa agendada grava e limpa o erro
+    monkeypatch.undo()
+    deadline = time.monotonic() + 5
+    while (store.write_error is not None or store._pending) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.write_error is None
+    assert titles(kanban_store.JsonBoardStore(path).load()) == {"backlog": ["a"], "done": []}
+    store.close()